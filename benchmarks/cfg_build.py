@@ -0,0 +1,172 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from slither.core.cfg.node import NodeType
+
+from modules.cfg_builder.cfg import CFG
+
+
+class SyntheticNode:
+    """
+    Minimal stand-in for a Slither Node, only what the CFG builder reads
+    """
+
+    def __init__(self, node_id: int, node_type: NodeType):
+        self.node_id = node_id
+        self.type = node_type
+        self.sons = []
+        self.fathers = []
+        self.son_true = None
+        self.son_false = None
+        self.state_variables_written = []
+        self.state_variables_read = []
+
+    def __str__(self):
+        return f"{self.type} {self.node_id}"
+
+
+class SyntheticFunction:
+    def __init__(self, name: str):
+        self.id = name
+        self.name = name
+        self.nodes = []
+
+    def add_node(self, node_type: NodeType) -> SyntheticNode:
+        node = SyntheticNode(len(self.nodes), node_type)
+        self.nodes.append(node)
+        return node
+
+
+class SyntheticContract:
+    id = "Synthetic"
+    name = "Synthetic"
+
+
+def link(father: SyntheticNode, son: SyntheticNode):
+    father.sons.append(son)
+    son.fathers.append(father)
+
+
+def build_function(statements: int, shape: str) -> SyntheticFunction:
+    """Generates the Slither node graph of a function with the given number of statements
+
+    shape:
+        straight: one expression per statement
+        branches: an if/else with one statement per branch every 10 statements
+        loops: a for loop with one statement in its body every 10 statements
+    """
+    function = SyntheticFunction(f"{shape}_{statements}")
+    last = function.add_node(NodeType.ENTRYPOINT)
+
+    emitted = 0
+    while emitted < statements:
+        if shape == "branches" and emitted % 10 == 9:
+            if_node = function.add_node(NodeType.IF)
+            true_node = function.add_node(NodeType.EXPRESSION)
+            false_node = function.add_node(NodeType.EXPRESSION)
+            end_if = function.add_node(NodeType.ENDIF)
+
+            link(last, if_node)
+            if_node.son_true, if_node.son_false = true_node, false_node
+            link(if_node, true_node)
+            link(if_node, false_node)
+            link(true_node, end_if)
+            link(false_node, end_if)
+
+            last = end_if
+            emitted += 3
+
+        elif shape == "loops" and emitted % 10 == 9:
+            init_node = function.add_node(NodeType.VARIABLE)
+            start_loop = function.add_node(NodeType.STARTLOOP)
+            if_loop = function.add_node(NodeType.IFLOOP)
+            body_node = function.add_node(NodeType.EXPRESSION)
+            increment = function.add_node(NodeType.EXPRESSION)
+            end_loop = function.add_node(NodeType.ENDLOOP)
+
+            link(last, init_node)
+            link(init_node, start_loop)
+            link(start_loop, if_loop)
+            if_loop.son_true, if_loop.son_false = body_node, end_loop
+            link(if_loop, body_node)
+            link(if_loop, end_loop)
+            link(body_node, increment)
+            link(increment, if_loop)
+
+            last = end_loop
+            emitted += 3
+
+        else:
+            node = function.add_node(NodeType.EXPRESSION)
+            link(last, node)
+            last = node
+            emitted += 1
+
+    return function
+
+
+def measure_build(function: SyntheticFunction, repeat: int) -> float:
+    """Returns the best CFG build time in seconds"""
+    best = float("inf")
+
+    for _ in range(repeat):
+        cfg = CFG("synthetic.sol", SyntheticContract(), function)
+
+        start = time.perf_counter()
+        cfg.build_cfg()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CFG construction benchmark")
+    parser.add_argument(
+        "-s",
+        "--statements",
+        type=int,
+        default=10000,
+        help="statements of the largest synthetic function",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="builds per function, best is kept"
+    )
+    parser.add_argument(
+        "--max_growth",
+        type=float,
+        default=2.0,
+        help="allowed per-statement slowdown of the largest function over the smallest one",
+    )
+    args = parser.parse_args()
+
+    sizes = [args.statements // 10, args.statements // 2, args.statements]
+    failed = False
+
+    for shape in ["straight", "branches", "loops"]:
+        per_statement = []
+
+        for size in sizes:
+            elapsed = measure_build(build_function(size, shape), args.repeat)
+            per_statement.append(elapsed / size)
+
+            print(
+                f"{shape:>9} {size:>7} statements: {elapsed * 1000:8.2f}ms "
+                f"({elapsed / size * 1e6:.2f}us/statement)"
+            )
+
+        # linear construction keeps a constant cost per statement
+        growth = per_statement[-1] / per_statement[0]
+        if growth > args.max_growth:
+            print(f"{shape}: per-statement cost grew {growth:.2f}x, expected linear")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+import time
+from copy import deepcopy
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from z3 import Int
+
+from modules.symbolic_execution_engine.linkedStack import LinkedStack
+from modules.symbolic_execution_engine.symbolicTable import SymbolicTable, SymbolType
+
+
+def init_table(variables: int) -> SymbolicTable:
+    """
+    Table with the function arguments and storage variables of every path
+    """
+    table = SymbolicTable()
+    for index in range(variables):
+        table.push_symbol(f"v{index}", SymbolType.PRIMITIVE)
+    return table
+
+
+def explore_deepcopy(ifs: int, variables: int) -> int:
+    """Explores every path of a function with sequential ifs, deep copying the state per branch
+
+    Returns:
+        int: number of forks
+    """
+    forks = 0
+
+    def explore(level: int, table: SymbolicTable, path_constraints: list, loop_scope: list):
+        nonlocal forks
+        if level == ifs:
+            return
+
+        condition = Int(f"v{level % variables}") > level
+        for constraint in [condition, condition == False]:
+            new_table = deepcopy(table)
+            new_loop_scope = deepcopy(loop_scope)
+            new_path_constraints = deepcopy(path_constraints)
+            new_path_constraints.append(constraint)
+            forks += 1
+
+            # each branch assigns one variable
+            new_table.update_symbol(f"v{level % variables}", Int("x") + level, new_loop_scope)
+            explore(level + 1, new_table, new_path_constraints, new_loop_scope)
+
+    explore(0, init_table(variables), [], [])
+    return forks
+
+
+def explore_fork(ifs: int, variables: int) -> int:
+    """Explores every path of a function with sequential ifs, with copy-on-write forks
+
+    Returns:
+        int: number of forks
+    """
+    forks = 0
+
+    def explore(
+        level: int,
+        table: SymbolicTable,
+        path_constraints: LinkedStack,
+        loop_scope: LinkedStack,
+    ):
+        nonlocal forks
+        if level == ifs:
+            return
+
+        condition = Int(f"v{level % variables}") > level
+        for constraint in [condition, condition == False]:
+            new_table = table.fork()
+            new_path_constraints = path_constraints.push(constraint)
+            forks += 1
+
+            new_table.update_symbol(f"v{level % variables}", Int("x") + level, loop_scope)
+            explore(level + 1, new_table, new_path_constraints, loop_scope)
+
+    explore(0, init_table(variables), LinkedStack(), LinkedStack())
+    return forks
+
+
+def measure(explore, ifs: int, variables: int, repeat: int):
+    """Returns the best exploration time in seconds and the number of forks"""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forks = explore(ifs, variables)
+        best = min(best, time.perf_counter() - start)
+
+    return best, forks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of forking the symbolic state")
+    parser.add_argument(
+        "-i", "--ifs", type=int, default=12, help="sequential ifs of the largest function"
+    )
+    parser.add_argument(
+        "-n",
+        "--variables",
+        type=int,
+        default=30,
+        help="function arguments and storage variables",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="explorations per function, best is kept"
+    )
+    args = parser.parse_args()
+
+    for ifs in range(10, args.ifs + 1):
+        deepcopy_time, forks = measure(explore_deepcopy, ifs, args.variables, args.repeat)
+        fork_time, _ = measure(explore_fork, ifs, args.variables, args.repeat)
+
+        print(
+            f"{ifs:>3} ifs ({forks:>5} forks): "
+            f"deepcopy {deepcopy_time * 1e6 / forks:8.2f}us/fork, "
+            f"copy-on-write {fork_time * 1e6 / forks:8.2f}us/fork "
+            f"({deepcopy_time / fork_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
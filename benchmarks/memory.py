@@ -0,0 +1,140 @@
+import argparse
+import glob
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+SAMPLE_CONTRACTS = ["contracts/*.sol", "sc-examples/*.sol"]
+
+
+def measure_objects(count: int, repeat: int):
+    """Allocates the small objects that dominate a run and copies symbolic tables
+
+    Returns:
+        dict(metric, value): allocated bytes per object kind, best deepcopy time of a table
+    """
+    from types import SimpleNamespace
+
+    from modules.cfg_builder.cfg import CFG
+    from modules.code_optimizer.siphonNode import SiphonNode
+    from modules.pattern_matcher.patterns import LoopInvariantConditionPattern
+    from modules.symbolic_execution_engine.symbolicTable import SymbolicTable
+
+    metrics = {}
+
+    def allocated(factory) -> int:
+        tracemalloc.start()
+        objects = factory()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+        return size
+
+    cfg = CFG(
+        "synthetic.sol",
+        SimpleNamespace(id=1, name="Synthetic"),
+        SimpleNamespace(id=2, name="synthetic", nodes=[]),
+    )
+
+    metrics["symbols"] = allocated(lambda: _fill_table(SymbolicTable(), count))
+    metrics["blocks"] = allocated(lambda: [cfg.allocate_block() for _ in range(count)])
+    metrics["siphon_nodes"] = allocated(
+        lambda: [SiphonNode(None, "x = y;") for _ in range(count)]
+    )
+    metrics["patterns"] = allocated(
+        lambda: [
+            LoopInvariantConditionPattern(cfg.head, None, "x < y", 0)
+            for _ in range(count)
+        ]
+    )
+
+    # symbolic execution deep copies the table on every branch
+    table = _fill_table(SymbolicTable(), count)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        deepcopy(table)
+        best = min(best, time.perf_counter() - start)
+    metrics["table_deepcopy_ms"] = best * 1000
+
+    return metrics
+
+
+def _fill_table(table, count: int):
+    from modules.symbolic_execution_engine.symbolicTable import SymbolType
+
+    for index in range(count):
+        table.push_symbol(f"v{index}", SymbolType.PRIMITIVE, index % 4)
+    return table
+
+
+def measure_pipeline(file: str) -> int:
+    """Runs siphon.py over the file in a fresh process
+
+    Returns:
+        int: peak RSS of the run in KB, None if it failed
+    """
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    process = subprocess.run(
+        [sys.executable, "siphon.py", "-f", file, "-nc"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+    )
+
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if process.returncode != 0:
+        return None
+
+    # ru_maxrss of children is the max over all of them, only report increases
+    return peak if peak > before else before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint benchmark")
+    parser.add_argument(
+        "-n", "--objects", type=int, default=20000, help="objects per kind"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="table copies, best is kept"
+    )
+    parser.add_argument(
+        "-p",
+        "--pipeline",
+        action="store_true",
+        help="also measure the peak RSS of the pipeline on the sample contracts",
+    )
+    args = parser.parse_args()
+
+    metrics = measure_objects(args.objects, args.repeat)
+    for kind in ["symbols", "blocks", "siphon_nodes", "patterns"]:
+        print(
+            f"{kind:>13}: {metrics[kind] / 1024 / 1024:8.2f}MB "
+            f"({metrics[kind] / args.objects:.0f}B/object)"
+        )
+    print(
+        f"table deepcopy: {metrics['table_deepcopy_ms']:8.2f}ms ({args.objects} symbols)"
+    )
+
+    if not args.pipeline:
+        return
+
+    for pattern in SAMPLE_CONTRACTS:
+        for file in sorted(glob.glob(os.path.join(ROOT_DIR, pattern))):
+            file = os.path.relpath(file, ROOT_DIR)
+            peak = measure_pipeline(file)
+            print(
+                f"{file:>45}: "
+                + (f"{peak / 1024:8.2f}MB peak RSS" if peak else "failed")
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from z3 import And, Implies, Int, Not, Solver, sat, unsat
+
+from modules.pattern_matcher.patternMatcher import PatternMatcher
+from modules.pattern_matcher.queryCache import queryCache
+
+
+def build_conditions(depth: int, seed: int) -> list:
+    """Generates the branch conditions of a function with nested ifs,
+    in the style of sc-examples/Test.sol (arguments and storage compared to constants)
+
+    Returns:
+        list: one condition per nesting level, reused by both branches of that level
+    """
+    rng = random.Random(seed)
+    variables = [Int("x"), Int("y"), Int("s_result"), Int("s_condition")]
+
+    conditions = []
+    for _ in range(depth):
+        left, right = rng.sample(variables, 2)
+        constant = rng.randint(0, 100)
+        match rng.randint(0, 2):
+            case 0:
+                conditions.append(left > constant)
+            case 1:
+                conditions.append(left < constant)
+            case _:
+                conditions.append(left + right > constant)
+    return conditions
+
+
+def explore_rebuild(conditions: list) -> dict:
+    """
+    Exploration with the whole path prefix asserted again on every query
+    """
+    solver = Solver()
+    stats = {"paths": 0, "p1": 0, "p2": 0}
+
+    def explore(level: int, path: list):
+        if level == len(conditions):
+            stats["paths"] += 1
+            return
+
+        condition = conditions[level]
+
+        # P1 on both branches
+        true_sat = solver.check(And(*path, condition) if path else condition) == sat
+        false_sat = (
+            solver.check(And(*path, Not(condition)) if path else Not(condition)) == sat
+        )
+
+        # P2 on both branches, Not(Implies(And(path), condition))
+        premise = And(path)
+        is_opaque = solver.check(Not(Implies(premise, condition))) == unsat
+        solver.check(Not(Implies(premise, Not(condition))))
+
+        # patterns are only reported for the true branch
+        stats["p1"] += not true_sat
+        stats["p2"] += is_opaque
+
+        if true_sat:
+            explore(level + 1, path + [condition])
+        if false_sat:
+            explore(level + 1, path + [Not(condition)])
+
+    explore(0, [])
+    return stats
+
+
+def explore_incremental(conditions: list) -> dict:
+    """
+    Exploration as done by the SE engine, one solver scope per branch
+    """
+    pattern_matcher = PatternMatcher()
+    solver = pattern_matcher.solver
+    stats = {"paths": 0, "p1": 0, "p2": 0}
+
+    def explore(level: int, path: list):
+        if level == len(conditions):
+            stats["paths"] += 1
+            return
+
+        condition = conditions[level]
+
+        # each IF is its own block and instruction, patterns are not deduplicated across levels
+        block = SimpleNamespace(id=level)
+        instruction = SimpleNamespace(node_id=level)
+
+        true_sat = pattern_matcher.p1_redundant_code(block, instruction, condition, path)
+        false_sat = pattern_matcher.p1_redundant_code(
+            block, instruction, Not(condition), path, True
+        )
+        pattern_matcher.p2_opaque_predicate(block, instruction, condition, path)
+        pattern_matcher.p2_opaque_predicate(
+            block, instruction, Not(condition), path, True
+        )
+
+        for is_sat, constraint in [(true_sat, condition), (false_sat, Not(condition))]:
+            if is_sat:
+                solver.push()
+                solver.add(constraint)
+                explore(level + 1, path + [constraint])
+                solver.pop()
+
+    explore(0, [])
+
+    stats["p1"] = sum(
+        candidate.__class__.__name__ == "RedundantCodePattern"
+        for candidate in pattern_matcher._pattern_candidates
+    )
+    stats["p2"] = sum(
+        candidate.__class__.__name__ == "OpaquePredicatePattern"
+        for candidate in pattern_matcher._pattern_candidates
+    )
+    return stats
+
+
+def measure(explore, conditions: list, repeat: int):
+    """Returns the best exploration time in seconds and the exploration stats"""
+    best = float("inf")
+
+    for _ in range(repeat):
+        # only the queries repeated within one exploration may hit
+        queryCache.clear()
+
+        start = time.perf_counter()
+        stats = explore(conditions)
+        best = min(best, time.perf_counter() - start)
+
+    return best, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solver time on nested branches")
+    parser.add_argument(
+        "-d", "--depth", type=int, default=12, help="deepest nesting of ifs"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="explorations per depth, best is kept"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=7, help="condition seed")
+    args = parser.parse_args()
+
+    for depth in range(4, args.depth + 1, 4):
+        conditions = build_conditions(depth, args.seed)
+
+        rebuild_time, rebuild_stats = measure(explore_rebuild, conditions, args.repeat)
+
+        queryCache.init_instance(enabled=False)
+        incremental_time, incremental_stats = measure(
+            explore_incremental, conditions, args.repeat
+        )
+
+        queryCache.init_instance(enabled=True)
+        hits = queryCache.hits
+        cached_time, cached_stats = measure(
+            explore_incremental, conditions, args.repeat
+        )
+        hits = (queryCache.hits - hits) // args.repeat
+
+        # every exploration must take the same decisions
+        for stats in [incremental_stats, cached_stats]:
+            if rebuild_stats != stats:
+                print(f"depth {depth}: results differ {rebuild_stats} != {stats}")
+                sys.exit(1)
+
+        print(
+            f"depth {depth:>3} ({incremental_stats['paths']:>5} paths): "
+            f"rebuild {rebuild_time * 1000:9.2f}ms, "
+            f"incremental {incremental_time * 1000:9.2f}ms "
+            f"({rebuild_time / incremental_time:.2f}x), "
+            f"cached {cached_time * 1000:9.2f}ms ({hits} hits)"
+        )
+
+
+if __name__ == "__main__":
+    main()
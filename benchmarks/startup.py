@@ -0,0 +1,82 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# modules that must never be loaded to print the help or reject arguments
+HEAVY_MODULES = ["slither", "z3", "crytic_compile", "modules"]
+
+# imported by the interpreter itself before siphon.py runs
+INTERPRETER_MODULES = ["site", "encodings", "_frozen_importlib_external"]
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_startup():
+    """Runs `python -X importtime siphon.py --help`
+
+    Returns:
+        (int, list(str)): import time of siphon.py in microseconds, top-level modules imported
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "siphon.py", "--help"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr)
+
+    total = 0
+    modules = []
+    for line in process.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)", line)
+        if not match:
+            continue
+
+        cumulative, indentation, module = int(match[2]), match[3], match[4]
+
+        # only count top-level imports, nested ones are part of their cumulative time
+        if len(indentation) > 1 or module.split(".")[0] in INTERPRETER_MODULES:
+            continue
+
+        total += cumulative
+        modules.append(module)
+
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Siphon startup benchmark")
+    parser.add_argument("-r", "--runs", type=int, default=5, help="Number of runs")
+    parser.add_argument(
+        "-b", "--budget", type=int, default=50, help="Import time budget (ms)"
+    )
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        total, modules = measure_startup()
+        timings.append(total)
+
+    best = min(timings) / 1000
+    print(f"[*] - siphon.py --help imports: {best:.1f}ms (best of {args.runs})")
+
+    heavy_modules = [
+        module for module in modules if module.split(".")[0] in HEAVY_MODULES
+    ]
+
+    if heavy_modules:
+        print(f"[*] - Regression: heavy modules imported eagerly: {heavy_modules}")
+        sys.exit(1)
+
+    if best > args.budget:
+        print(f"[*] - Regression: over the {args.budget}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,4 @@
 #!/bin/bash
 
- # Find all .sol files in the search directory and its subdirectories
-shopt -s globstar
-for file in dataset/*.sol; do
-    if [[ -f "$file" ]]; then
-        ./siphon.sh -f "$file" -fm
-    fi
-done
\ No newline at end of file
+# Analyse every .sol file in the dataset within a single Siphon process
+./siphon.sh -f dataset -fm
\ No newline at end of file
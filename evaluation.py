@@ -1,9 +1,9 @@
 from slither.slither import Slither
 import os
 import shutil
-from functools import reduce
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+import argparse
+from functools import partial
 import re
 import math
 import random
@@ -11,6 +11,12 @@ import json
 import matplotlib.pyplot as plt
 import numpy as np
 
+from modules.slither.compilationCache import compilationCache
+from modules.slither.solcSelector import get_compile_settings
+from modules.runner.parallelRunner import ParallelRunner
+
+from siphon import run_file, add_pipeline_arguments, init_pipeline
+
 pattern_list = [
     "REDUNDANT_CODE",
     "OPAQUE_PREDICATE",
@@ -46,7 +52,7 @@ def try_compile_and_move():
     file_names = get_file_names("filtered")
     for file in file_names:
         try:
-            Slither(file)
+            Slither(compilationCache.compile(file, **get_compile_settings(file)))
             shutil.copy("./" + file, "./compiled")
         except:
             pass
@@ -61,10 +67,10 @@ def count(file, curr):
     function_nodes = 0
 
     try:
-        slither = Slither(file)
+        slither = Slither(compilationCache.compile(file, **get_compile_settings(file)))
     except:
         print("ERROR:", file)
-        return 0, 0
+        return 0, 0, 0, 0, 0
 
     for contract in slither.contracts:
         print("Contract:", contract.name)
@@ -89,32 +95,34 @@ def count(file, curr):
     return contract_num, function_num, function_num_3, function_num_10, function_nodes
 
 
-def contracts_and_functions():
+def contracts_and_functions(jobs=None, setup=None):
     contract_num = 0
     function_num = 0
     function_num_3 = 0
     function_num_10 = 0
     function_nodes = 0
 
-    futures = []
-
     file_names = get_file_names("compiled")
 
-    with ThreadPoolExecutor() as executor:
-        for index, file in enumerate(file_names):
-            curr = str(index) + "/" + str(len(file_names))
-            futures.append(executor.submit(count, file, curr))
+    results = ParallelRunner(jobs, initializer=setup).run(
+        count,
+        [
+            (file, str(index) + "/" + str(len(file_names)))
+            for index, file in enumerate(file_names)
+        ],
+    )
 
-    wait(futures)
+    for result in results:
+        if result["error"]:
+            continue
 
-    for future in futures:
         (
             result_contract_num,
             result_function_num,
             result_function_num_3,
             result_function_num_10,
             result_function_nodes,
-        ) = future.result()
+        ) = result["result"]
         contract_num += result_contract_num
         function_num += result_function_num
         function_num_3 += result_function_num_3
@@ -135,90 +143,78 @@ def contracts_and_functions():
     )
 
 
-def run_contract(file, curr):
+def list_contracts(file):
+    slither = Slither(compilationCache.compile(file, **get_compile_settings(file)))
+
+    return [
+        contract.name
+        for contract in slither.contracts
+        if not contract.is_library and not contract.is_interface
+    ]
+
+
+def run_contract(file, contract_name, curr):
     print("Current file:", file, curr)
+    print("Current contract:", contract_name)
 
-    slither = Slither(file)
+    # the compilation is a cache hit, solc only ran once per file
+    return run_file(file, contract_name)
 
-    contracts = list(
-        filter(
-            lambda contract: not contract.is_library and not contract.is_interface,
-            slither.contracts,
-        )
-    )
 
-    function_by_contract = reduce(
-        lambda result, contract: result.update(
-            {
-                contract.name: list(
-                    {
-                        fn
-                        for fn in contract.functions
-                        if not fn.name.startswith(
-                            "slither"
-                        )  # ignore functions injected by slither
-                    }
-                )
-            }
-        )
-        or result,
-        contracts,
-        {},
+def exec_on_func_basis(jobs=None, setup=None):
+    file_names = get_file_names("compiled")
+
+    contracts = ParallelRunner(jobs, initializer=setup).run(
+        list_contracts, [(file,) for file in file_names]
     )
 
-    for contract in contracts:
-        print("Current contract:", contract.name)
-        functions = function_by_contract.get(contract.name, [])
+    # one task per contract, so the 30s limit stays per contract and not per file
+    results = ParallelRunner(jobs, timeout=30, initializer=setup).run(
+        run_contract,
+        [
+            (file, contract_name, str(index) + "/" + str(len(file_names)))
+            for index, (file, result) in enumerate(zip(file_names, contracts))
+            if not result["error"]
+            for contract_name in result["result"]
+        ],
+    )
 
-        script_path = "siphon.py"
-        try:
-            subprocess.run(
-                [
-                    "python3",
-                    script_path,
-                    "-f",
-                    file,
-                    "-c",
-                    contract.name,
-                ],
-                timeout=30,
-            )
-        except:
-            pass
+    os.makedirs("output", exist_ok=True)
+    with open(os.path.join("output", "results.json"), "w") as f:
+        json.dump(results, f)
 
-        # for function in functions:
-        #     print("Current function:", function.name)
-        #     script_path = "siphon.py"
-        #     try:
-        #         subprocess.run(
-        #             [
-        #                 "python3",
-        #                 script_path,
-        #                 "-f",
-        #                 file,
-        #                 "-c",
-        #                 contract.name,
-        #                 "-fn",
-        #                 function.name,
-        #             ],
-        #             timeout=30,
-        #         )
-        #     except:
-        #         pass
-
-
-def exec_on_func_basis():
-    file_names = get_file_names("compiled")
-    futures = []
-    with ThreadPoolExecutor() as executor:
-        for index, file in enumerate(file_names):
-            curr = str(index) + "/" + str(len(file_names))
-            futures.append(executor.submit(run_contract, file, curr))
-        wait(futures)
+    return results
 
 
-def successfully_executed():
+def successfully_executed(results=None):
     all_files = get_file_names("compiled")
+
+    if results is not None:
+        # structured results from exec_on_func_basis, no need to walk the output
+        executed = [
+            function_result
+            for result in results
+            if not result["error"]
+            for function_result in result["result"]
+        ]
+
+        print(
+            "Total files:",
+            len(all_files),
+            "Executed files:",
+            len({function_result["filename"] for function_result in executed}),
+            "Executed Smart Contracts:",
+            len(
+                {
+                    (function_result["filename"], function_result["contract"])
+                    for function_result in executed
+                }
+            ),
+            "Executed functions:",
+            len(executed),
+        )
+        return
+
     executed_files = get_directories("output/compiled")
 
     total_executed_smart_contracts = 0
@@ -584,12 +580,12 @@ def detection_sampling():
         json.dump(chosen_patterns, json_file)
 
 
-def coersion_fix_executor(pattern_dir):
+def coersion_fix_tasks(pattern_dir):
     pattern_path = os.path.join("sorted_by_patterns", pattern_dir)
     optimized_files = get_directories(pattern_path)
 
-    for index, optimized_file in enumerate(optimized_files):
-        print(f"Current file - {pattern_dir}: {index + 1} / {len(optimized_files)}")
+    tasks = []
+    for optimized_file in optimized_files:
         optimized_file_path = os.path.join(pattern_path, optimized_file)
         optimized_smart_contracts = get_directories(optimized_file_path)
 
@@ -607,33 +603,21 @@ def coersion_fix_executor(pattern_dir):
                     optimized_file + ".sol",
                 )
 
-                script_path = "siphon.py"
-                try:
-                    subprocess.run(
-                        [
-                            "python3",
-                            script_path,
-                            "-f",
-                            original_file_path,
-                            "-c",
-                            optimized_smart_contract,
-                            "-fn",
-                            optimized_function,
-                        ],
-                        timeout=30,
-                    )
-                except:
-                    pass
+                tasks.append(
+                    (original_file_path, optimized_smart_contract, optimized_function)
+                )
 
+    return tasks
 
-def coersion_fix():
+
+def coersion_fix(jobs=None, setup=None):
     pattern_dirs = get_directories("sorted_by_patterns")
 
-    futures = []
-    with ThreadPoolExecutor() as executor:
-        for index, pattern in enumerate(pattern_dirs):
-            futures.append(executor.submit(coersion_fix_executor, pattern))
-        wait(futures)
+    tasks = [task for pattern in pattern_dirs for task in coersion_fix_tasks(pattern)]
+
+    print(f"Re-running {len(tasks)} functions")
+
+    return ParallelRunner(jobs, timeout=30, initializer=setup).run(run_file, tasks)
 
 
 def generate_find_charts():
@@ -986,19 +970,30 @@ def generate_optimized_charts():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Siphon Evaluation")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    add_pipeline_arguments(parser)
+    args = parser.parse_args()
+
+    # the workers run the pipeline with the same options as the parent
+    init_pipeline(args)
+    setup = partial(init_pipeline, args)
+
     # to filter contracts that don't compile with Solidty version 0.8.0
     try_compile_and_move()
 
     # gather dataset statistics
-    contracts_and_functions()
+    contracts_and_functions(args.jobs, setup)
 
     # exec Siphon on the dataset
-    exec_on_func_basis()
+    results = exec_on_func_basis(args.jobs, setup)
 
-    coersion_fix()
+    coersion_fix(args.jobs, setup)
 
     # gather analysis statistics
-    successfully_executed()
+    successfully_executed(results)
 
     # count detected patterns
     count_patterns_and_optimized_functions()
@@ -1,29 +1,83 @@
 import os
+import json
 import shutil
+from collections import defaultdict
 
+from crytic_compile import CryticCompile
+from crytic_compile.platform.solc_standard_json import SolcStandardJson
 
-def process_file(file_path, filtered_dir):
-    new_file_path = os.path.join(filtered_dir, os.path.basename(file_path))
-    with open(file_path, "r", encoding="utf-8") as file:
-        lines = file.readlines()
+from modules.slither.solcSelector import select_solc, format_version
 
-    with open(new_file_path, "w", encoding="utf-8") as new_file:
-        for line in lines:
-            if line.strip().startswith("pragma solidity"):
-                # Replace the line with 'pragma solidity 0.8.0;'
-                line = "pragma solidity 0.8.0;\n"
-            new_file.write(line)
 
-    print(f"Created new file {new_file_path} with modified pragma")
+def group_by_compiler(file_paths):
+    """
+    Group the files by the newest installed solc satisfying their pragmas
+    """
+    groups = defaultdict(list)
+    compilers = {}
+    unsupported = []
+
+    for file_path in file_paths:
+        version, solc = select_solc(file_path)
+
+        if version is None:
+            unsupported.append(file_path)
+            continue
+
+        groups[version].append(file_path)
+        compilers[version] = solc
+
+    return groups, compilers, unsupported
+
+
+def compile_group(file_paths, solc):
+    """
+    Compile the files in one solc invocation,
+    on failure bisect the group to isolate the files that don't compile
+    """
+    try:
+        standard_json = SolcStandardJson(file_paths[0])
+        standard_json.add_source_files(file_paths)
+        CryticCompile(standard_json, solc=solc)
+        return file_paths
+    except Exception:
+        if len(file_paths) == 1:
+            print(f"Failed to compile {file_paths[0]}")
+            return []
+
+    middle = len(file_paths) // 2
+    return compile_group(file_paths[:middle], solc) + compile_group(
+        file_paths[middle:], solc
+    )
 
 
 def filter_directory(source_dir, filtered_dir):
     os.makedirs(filtered_dir, exist_ok=True)
 
-    for filename in os.listdir(source_dir):
-        if filename.endswith(".sol"):
-            file_path = os.path.join(source_dir, filename)
-            process_file(file_path, filtered_dir)
+    file_paths = [
+        os.path.join(source_dir, filename)
+        for filename in sorted(os.listdir(source_dir))
+        if filename.endswith(".sol")
+    ]
+
+    groups, compilers, unsupported = group_by_compiler(file_paths)
+
+    for file_path in unsupported:
+        print(f"No installed solc satisfies the pragma of {file_path}")
+
+    versions = {}
+    for version in sorted(groups, reverse=True):
+        print(f"Compiling {len(groups[version])} files with solc {format_version(version)}")
+
+        for file_path in compile_group(groups[version], compilers[version]):
+            shutil.copy(file_path, filtered_dir)
+            versions[os.path.basename(file_path)] = format_version(version)
+
+    # selected compiler of every file that compiled
+    with open(os.path.join(filtered_dir, "versions.json"), "w", encoding="utf-8") as f:
+        json.dump(versions, f, indent=4, sort_keys=True)
+
+    print(f"{len(versions)} of {len(file_paths)} files compiled into {filtered_dir}")
 
 
 if __name__ == "__main__":
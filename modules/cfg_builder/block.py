@@ -1,56 +1,97 @@
-from typing import List, Dict, Union
-from random import randint
+from typing import List, Tuple, Union, TYPE_CHECKING
 
-from slither.core.cfg.node import Node
-from slither.core.variables.state_variable import StateVariable
+from slither.core.cfg.node import Node, NodeType
 
 from modules.code_optimizer.siphonNode import SiphonNode
 
+if TYPE_CHECKING:
+    from modules.cfg_builder.cfg import CFG
+
 
 class Block:
     """
     Block class
 
+    Paths and traversal flags are stored in the flat arrays of the owning CFG,
+    indexed by the dense block id
+
     """
 
-    def __init__(self):
+    # no per-instance __dict__, large functions create many blocks
+    __slots__ = (
+        "_cfg",
+        "_id",
+        "_instructions",
+        "_instructions_view",
+        "_has_loop_start",
+        "_storage_reads",
+        "_storage_writes",
+        "_reachability",
+    )
+
+    def __init__(self, cfg: "CFG", id: int):
+        # owning CFG, allocates the id
+        self._cfg: "CFG" = cfg
+        self._id: int = id
+
         # instructions inside the block
         self._instructions: List[Union["Node", "SiphonNode"]] = []
 
-        # storage accesses
-        self._state_variables_written: Dict[str, int] = {}
-        self._state_variables_read: Dict[str, int] = {}
-
-        # paths to follow in case of a new block or branch conditions
-        self._true_path: Block = None
-        self._false_path: Block = None
-        self._prev_block: Block = None
+        # read-only snapshot of the instructions and cached lookups, reset on mutation
+        self._instructions_view: Tuple[Union["Node", "SiphonNode"], ...] = None
+        self._has_loop_start: bool = None
 
-        # used by the CFG builder to ensure that loops are only traversed once
-        self._visited: bool = False
-
-        # TODO is this good enough?
-        self._id: int = randint(0, 10000)
+        # storage accesses
+        # bitsets over the state variable ids interned by the CFG
+        self._storage_reads: int = 0
+        self._storage_writes: int = 0
 
         # reachability via paths, used to remove P1/P2 false positives in the PatternMatcher
         self._reachability: list[int] = []
 
-        # in the CodeGenerator avoid generating again when false path ends
-        self._was_converted_to_source: bool = False
-
     def __str__(self):
         return "\n".join(
             map(repr, [str(instruction) for instruction in self.instructions])
         )
 
     @property
-    def instructions(self) -> List["Node"]:
-        """Returns the list of instructions within this block
+    def instructions(self) -> Tuple["Node", ...]:
+        """Returns the instructions within this block, without copying them on every access
+
+        Returns:
+            tuple(Node): read-only snapshot of the instructions
+        """
+        if self._instructions_view is None:
+            self._instructions_view = tuple(self._instructions)
+        return self._instructions_view
+
+    @property
+    def instruction_count(self) -> int:
+        """
+        Returns: number of instructions within this block
+        """
+        return len(self._instructions)
+
+    @property
+    def last_instruction(self) -> Union["Node", "SiphonNode"]:
+        """Returns the last instruction within this block
 
         Returns:
-            list(Node): list of instructions
+            Node: last instruction, None if the block is empty
         """
-        return list(self._instructions)
+        return self._instructions[-1] if self._instructions else None
+
+    @property
+    def has_loop_start(self) -> bool:
+        """
+        Returns: does the block contain a STARTLOOP instruction
+        """
+        if self._has_loop_start is None:
+            self._has_loop_start = any(
+                instruction.type == NodeType.STARTLOOP
+                for instruction in self._instructions
+            )
+        return self._has_loop_start
 
     @property
     def true_path(self) -> "Block":
@@ -59,7 +100,7 @@ class Block:
         Returns:
             Block: Next Block
         """
-        return self._true_path
+        return self._cfg.get_block(self._cfg.true_successors[self._id])
 
     @property
     def false_path(self) -> "Block":
@@ -68,7 +109,7 @@ class Block:
         Returns:
             Block: Next Block
         """
-        return self._false_path
+        return self._cfg.get_block(self._cfg.false_successors[self._id])
 
     @property
     def prev_block(self) -> "Block":
@@ -77,7 +118,16 @@ class Block:
         Returns:
             Block: Previous Block
         """
-        return self._prev_block
+        return self._cfg.get_block(self._cfg.predecessors[self._id])
+
+    @property
+    def cfg(self) -> "CFG":
+        """Returns the CFG owning the block
+
+        Returns:
+            CFG: owning CFG
+        """
+        return self._cfg
 
     @property
     def id(self) -> int:
@@ -89,72 +139,93 @@ class Block:
         return self._id
 
     @property
-    def state_variables_written(self) -> Dict[str, int]:
+    def storage_reads(self) -> int:
         """
-        dict(StateVariable): State variables written
+        int: bitset of the state variable ids read
         """
-        return self._state_variables_written
+        return self._storage_reads
 
     @property
-    def state_variables_read(self) -> Dict[str, int]:
+    def storage_writes(self) -> int:
         """
-        dict(StateVariable): State variables read
+        int: bitset of the state variable ids written
         """
-        return self._state_variables_read
+        return self._storage_writes
+
+    @property
+    def state_variables_written(self) -> List[str]:
+        """
+        list(str): Names of the state variables written
+        """
+        return self._cfg.get_state_variable_names(self._storage_writes)
+
+    @property
+    def state_variables_read(self) -> List[str]:
+        """
+        list(str): Names of the state variables read
+        """
+        return self._cfg.get_state_variable_names(self._storage_reads)
 
     @property
     def was_converted_to_source(self) -> bool:
         """
         bool(was_converted_to_source): Was Block already converted to source code
         """
-        return self._was_converted_to_source
+        # in the CodeGenerator avoid generating again when false path ends
+        return bool(self._cfg.converted_flags[self._id])
 
     @property
     def visited(self) -> bool:
         """
         Returns: was the block already visited
         """
-        return self._visited
+        # ensures that loops are only traversed once
+        return bool(self._cfg.visited_flags[self._id])
 
     @true_path.setter
     def true_path(self, value):
-        self._true_path = value
+        self._cfg.true_successors[self._id] = value.id if value else -1
 
     @false_path.setter
     def false_path(self, value):
-        self._false_path = value
+        self._cfg.false_successors[self._id] = value.id if value else -1
 
     @prev_block.setter
     def prev_block(self, value):
-        self._prev_block = value
-
-    @id.setter
-    def id(self, value):
-        self._id = value
+        self._cfg.predecessors[self._id] = value.id if value else -1
 
     @visited.setter
     def visited(self, value):
-        self._visited = value
+        self._cfg.visited_flags[self._id] = bool(value)
 
     @was_converted_to_source.setter
     def was_converted_to_source(self, value):
-        self._was_converted_to_source = value
+        self._cfg.converted_flags[self._id] = bool(value)
+
+    def get_instruction(self, index: int) -> Union["Node", "SiphonNode"]:
+        return self._instructions[index]
 
     def add_instruction(self, instruction: Node):
         self._instructions.append(instruction)
+        self.invalidate_instructions()
+
+    def insert_instruction(self, index: int, instruction: Union["Node", "SiphonNode"]):
+        self._instructions.insert(index, instruction)
+        self.invalidate_instructions()
 
-    def add_state_variable_written(self, variable: StateVariable):
-        symbol = variable.name
+    def replace_instruction(self, index: int, instruction: Union["Node", "SiphonNode"]):
+        self._instructions[index] = instruction
+        self.invalidate_instructions()
 
-        if variable.name in self._state_variables_written:
-            self._state_variables_written[symbol] += 1
-        else:
-            self._state_variables_written[symbol] = 1
+    def remove_instruction(self, index: int = -1) -> Union["Node", "SiphonNode"]:
+        instruction = self._instructions.pop(index)
+        self.invalidate_instructions()
+        return instruction
 
-    def add_state_variable_read(self, variable: StateVariable):
-        symbol = variable.name
+    def invalidate_instructions(self):
+        self._instructions_view = None
+        self._has_loop_start = None
 
-        if variable.name in self._state_variables_read:
-            self._state_variables_read[symbol] += 1
-        else:
-            self._state_variables_read[symbol] = 1
+    def add_storage_accesses(self, reads: int, writes: int):
+        self._storage_reads |= reads
+        self._storage_writes |= writes
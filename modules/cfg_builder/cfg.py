@@ -1,5 +1,5 @@
-import os
-from typing import Dict
+from array import array
+from typing import Dict, List, Tuple
 from random import randint
 
 from slither.core.declarations import Function, Contract
@@ -9,6 +9,8 @@ from slither.core.variables.state_variable import StateVariable
 from slither.core.declarations import StructureContract
 
 from modules.cfg_builder.block import Block
+from modules.cfg_builder.cfgExport import cfgExporter
+from modules.slither.functionSummaries import ContractSummaries, functionSummaryCache
 
 
 class CFG:
@@ -25,14 +27,43 @@ class CFG:
         self._contract: Contract = contract
         self._function: Function = function
 
-        # starting block
-        self._head: Block = Block()
-
         # visited nodes
         self._visited_nodes: dict = {}
 
-        # visited blocks
-        self._visited_blocks: dict = {}
+        # every block, indexed by its id. Ids are dense and allocated in creation order,
+        # so they are deterministic across processes
+        self._blocks: list[Block] = []
+
+        # paths and per-block metadata indexed by block id, -1 means no block
+        self._true_successors: array = array("i")
+        self._false_successors: array = array("i")
+        self._predecessors: array = array("i")
+        self._visited_flags: bytearray = bytearray()
+        self._converted_flags: bytearray = bytearray()
+
+        # starting block
+        self._head: Block = self.allocate_block()
+
+        # pending (handler, args) items of the CFG builder
+        self._worklist: list[tuple] = []
+
+        # dominator tree and loop-nest forest, indexed by block id
+        self._immediate_dominators: array = array("i")
+        self._dominator_entry: array = array("i")
+        self._dominator_exit: array = array("i")
+        self._loop_bodies: Dict[int, frozenset] = {}
+        self._innermost_loops: array = array("i")
+        self._parent_loops: Dict[int, int] = {}
+
+        # state variables interned to bit positions, in declaration order
+        self._state_variable_ids: Dict[str, int] = {}
+        self._state_variable_names: List[str] = []
+        for variable in getattr(contract, "state_variables", []):
+            self.intern_state_variable(variable.name)
+
+        # (reads, writes) bitsets per instruction node_id and per loop header
+        self._instruction_storage_accesses: Dict[int, Tuple[int, int]] = {}
+        self._loop_storage_accesses: Dict[int, Tuple[int, int]] = {}
 
         # for debugging
         self._export_cfg: bool = export_cfg
@@ -61,6 +92,15 @@ class CFG:
         """
         return self._contract
 
+    @property
+    def function_summaries(self) -> ContractSummaries:
+        """Returns the summaries of the functions of the contract
+
+        Returns:
+            ContractSummaries: computed once per contract, shared by its CFGs
+        """
+        return functionSummaryCache.get_summaries(self._contract)
+
     @property
     def head(self) -> Block:
         """Returns the starting block in the cfg
@@ -79,13 +119,81 @@ class CFG:
         return self._visited_nodes
 
     @property
-    def visited_blocks(self) -> Dict:
-        """Returns the mapping of visited blocks to their ids
+    def blocks(self) -> list[Block]:
+        """Returns every block of the CFG indexed by id, in creation order
+
+        Returns:
+            list(Block): list of blocks
+        """
+        return self._blocks
+
+    @property
+    def loop_headers(self) -> list[Block]:
+        """Returns the header of every natural loop
+
+        Returns:
+            list(Block): loop headers, by block id
+        """
+        return [self._blocks[header] for header in sorted(self._loop_bodies)]
+
+    @property
+    def state_variable_names(self) -> List[str]:
+        """Returns the interned state variables
 
         Returns:
-            Dict(vars): Dict of visited blocks to their ids
+            list(str): names, indexed by their bit in the storage bitsets
+        """
+        return self._state_variable_names
+
+    @property
+    def loop_bodies(self) -> Dict[int, frozenset]:
+        """Returns the blocks of every natural loop, header included
+
+        Returns:
+            Dict(int, frozenset): block ids by loop header id
+        """
+        return self._loop_bodies
+
+    @property
+    def true_successors(self) -> array:
+        """Returns the true path of every block
+
+        Returns:
+            array(int): block id of the true path, -1 if none
+        """
+        return self._true_successors
+
+    @property
+    def false_successors(self) -> array:
+        """Returns the false path of every block
+
+        Returns:
+            array(int): block id of the false path, -1 if none
+        """
+        return self._false_successors
+
+    @property
+    def predecessors(self) -> array:
+        """Returns the previous block of every block
+
+        Returns:
+            array(int): block id of the previous block, -1 if none
+        """
+        return self._predecessors
+
+    @property
+    def visited_flags(self) -> bytearray:
+        """
+        Returns: visited flag of every block
         """
-        return self._visited_blocks
+        return self._visited_flags
+
+    @property
+    def converted_flags(self) -> bytearray:
+        """
+        Returns: converted to source flag of every block
+        """
+        return self._converted_flags
 
     @property
     def export_cfg(self) -> bool:
@@ -100,19 +208,53 @@ class CFG:
         for node in self.function.nodes:
             if node.type != NodeType.ENTRYPOINT:
                 # find the first node with instructions
-                self.build_cfg_recursive(node, self._head)
+                self.build_cfg_from_node(node, self._head)
                 break
 
+        self.compute_loop_structure()
+
         if self.export_cfg:
-            cfg_to_dot(
-                self._filename,
-                self.contract.name,
-                self.function.name,
-                self.function.name,
-                self.head,
-            )
+            self.export()
 
-    def build_cfg_recursive(
+    def export(self, graph_name: str = None):
+        """
+        Export the CFG for debugging, in the format of the CfgExporter
+        """
+        cfgExporter.export(
+            self._filename,
+            self.contract.name,
+            self.function.name,
+            graph_name or self.function.name,
+            self.head,
+        )
+
+    def build_cfg_from_node(
+        self,
+        node: Node,
+        current_block: Block,
+        is_false_path=False,
+        true_path_loop_depth: list["Block"] = None,
+        false_path_loop_depth: list["Block"] = None,
+    ):
+        """
+        Builds the CFG with an explicit worklist instead of one Python frame per node.
+        Handlers schedule the nodes that follow and, when a branch must be completed first,
+        their own continuation. Items are popped LIFO, in the same order a depth-first
+        recursion would visit them
+        """
+        self.schedule_node(
+            node,
+            current_block,
+            is_false_path,
+            true_path_loop_depth,
+            false_path_loop_depth,
+        )
+
+        while self._worklist:
+            handler, args = self._worklist.pop()
+            handler(*args)
+
+    def schedule_node(
         self,
         node: Node,
         current_block: Block,
@@ -126,51 +268,50 @@ class CFG:
         if false_path_loop_depth is None:
             false_path_loop_depth = []
 
-        match node.type:
-            case NodeType.IF:
-                self.handle_if_case(
+        self._worklist.append(
+            (
+                self.visit_node,
+                (
                     node,
                     current_block,
                     is_false_path,
                     true_path_loop_depth,
                     false_path_loop_depth,
-                )
+                ),
+            )
+        )
+
+    def visit_node(
+        self,
+        node: Node,
+        current_block: Block,
+        is_false_path: bool,
+        true_path_loop_depth: list["Block"],
+        false_path_loop_depth: list["Block"],
+    ):
+        match node.type:
+            case NodeType.IF:
+                handler = self.handle_if_case
 
             case NodeType.ENDIF:
-                self.handle_end_if_case(
-                    node,
-                    current_block,
-                    is_false_path,
-                    true_path_loop_depth,
-                    false_path_loop_depth,
-                )
+                handler = self.handle_end_if_case
 
             case NodeType.STARTLOOP:
-                self.handle_start_loop_case(
-                    node,
-                    current_block,
-                    is_false_path,
-                    true_path_loop_depth,
-                    false_path_loop_depth,
-                )
+                handler = self.handle_start_loop_case
 
             case NodeType.IFLOOP:
-                self.handle_if_loop_case(
-                    node,
-                    current_block,
-                    is_false_path,
-                    true_path_loop_depth,
-                    false_path_loop_depth,
-                )
+                handler = self.handle_if_loop_case
 
             case _:
-                self.handle_default_case(
-                    node,
-                    current_block,
-                    is_false_path,
-                    true_path_loop_depth,
-                    false_path_loop_depth,
-                )
+                handler = self.handle_default_case
+
+        handler(
+            node,
+            current_block,
+            is_false_path,
+            true_path_loop_depth,
+            false_path_loop_depth,
+        )
 
     def handle_if_case(
         self,
@@ -181,7 +322,15 @@ class CFG:
         false_path_loop_depth: list["Block"] = None,
     ):
         true_block = self.create_new_block(current_block, False, node)
-        self.build_cfg_recursive(
+
+        # the false path is only built once the whole true path is
+        self._worklist.append(
+            (
+                self.handle_if_false_path,
+                (node, current_block, true_path_loop_depth, false_path_loop_depth),
+            )
+        )
+        self.schedule_node(
             node.son_true,
             true_block,
             False,
@@ -189,13 +338,20 @@ class CFG:
             false_path_loop_depth,
         )
 
+    def handle_if_false_path(
+        self,
+        node: Node,
+        current_block: Block,
+        true_path_loop_depth: list["Block"],
+        false_path_loop_depth: list["Block"],
+    ):
         # avoid creating a new block if else case does not exist
         if node.son_false.type == NodeType.ENDIF:
-            self.build_cfg_recursive(node.son_false, current_block, True)
+            self.schedule_node(node.son_false, current_block, True)
 
         else:
             false_block = self.create_new_block(current_block, True)
-            self.build_cfg_recursive(
+            self.schedule_node(
                 node.son_false,
                 false_block,
                 True,
@@ -221,12 +377,12 @@ class CFG:
             # Add additional ENDIF to close outside IF
             if (
                 is_false_path
-                and len(current_block.instructions) > 1
-                and current_block.instructions[-2].type != NodeType.ENDIF
+                and current_block.instruction_count > 1
+                and current_block.get_instruction(-2).type != NodeType.ENDIF
             ):
                 current_block.add_instruction(node)
 
-            self.build_cfg_recursive(
+            self.schedule_node(
                 node.sons[0],
                 current_block,
                 is_false_path,
@@ -235,12 +391,14 @@ class CFG:
             )
 
         # check if a block was already created in another path
-        # avoid recursively checking an already traversed path,
+        # avoid traversing an already traversed path again,
         # instead just connect the path to the existing block
-        elif created_block_id := self.visited_nodes.get(node.sons[0].node_id):
-            created_block = self.visited_blocks[created_block_id]
+        elif (
+            created_block_id := self.visited_nodes.get(node.sons[0].node_id)
+        ) is not None:
+            created_block = self.blocks[created_block_id]
 
-            if is_false_path and current_block.instructions[-1].type == NodeType.IF:
+            if is_false_path and current_block.last_instruction.type == NodeType.IF:
                 # else cases are in the false_path but not its subsequent instructions
                 current_block.false_path = created_block
             else:
@@ -248,7 +406,7 @@ class CFG:
 
         else:
             next_block = self.create_new_block(current_block, is_false_path)
-            self.build_cfg_recursive(
+            self.schedule_node(
                 node.sons[0],
                 next_block,
                 False,
@@ -280,7 +438,7 @@ class CFG:
         true_path_loop_depth.append(loop_block)
         false_path_loop_depth.append(loop_block)
 
-        self.build_cfg_recursive(
+        self.schedule_node(
             node.sons[0],
             loop_block,
             is_false_path,
@@ -297,7 +455,21 @@ class CFG:
         false_path_loop_depth: list["Block"] = None,
     ):
         loop_true_block = self.create_new_block(current_block, False, node)
-        self.build_cfg_recursive(
+
+        # the loop exit is only built once the loop body is
+        self._worklist.append(
+            (
+                self.handle_if_loop_false_path,
+                (
+                    node,
+                    current_block,
+                    is_false_path,
+                    true_path_loop_depth,
+                    false_path_loop_depth,
+                ),
+            )
+        )
+        self.schedule_node(
             node.son_true,
             loop_true_block,
             is_false_path,
@@ -305,9 +477,17 @@ class CFG:
             false_path_loop_depth,
         )
 
+    def handle_if_loop_false_path(
+        self,
+        node: Node,
+        current_block: Block,
+        is_false_path: bool,
+        true_path_loop_depth: list["Block"],
+        false_path_loop_depth: list["Block"],
+    ):
         if node.son_false.sons:
             loop_false_block = self.create_new_block(current_block, True)
-            self.build_cfg_recursive(
+            self.schedule_node(
                 node.son_false.sons[0],
                 loop_false_block,
                 is_false_path,
@@ -340,7 +520,7 @@ class CFG:
                 elif true_path_loop_depth:
                     current_block.true_path = true_path_loop_depth.pop()
 
-                self.build_cfg_recursive(
+                self.schedule_node(
                     node.sons[0].son_false,
                     current_block,
                     is_false_path,
@@ -349,7 +529,7 @@ class CFG:
                 )
 
             else:
-                self.build_cfg_recursive(
+                self.schedule_node(
                     node.sons[0],
                     current_block,
                     is_false_path,
@@ -360,8 +540,7 @@ class CFG:
     def create_new_block(
         self, current_block: Block, is_false_path=False, init_instruction: Node = None
     ) -> Block:
-        new_block = Block()
-        self.visited_blocks[new_block.id] = new_block
+        new_block = self.allocate_block()
 
         self.set_block_paths(current_block, new_block, is_false_path)
 
@@ -370,6 +549,24 @@ class CFG:
 
         return new_block
 
+    def allocate_block(self) -> Block:
+        """
+        Creates an unconnected block with the next sequential id
+        """
+        block = Block(self, len(self._blocks))
+        self._blocks.append(block)
+
+        self._true_successors.append(-1)
+        self._false_successors.append(-1)
+        self._predecessors.append(-1)
+        self._visited_flags.append(0)
+        self._converted_flags.append(0)
+
+        return block
+
+    def get_block(self, block_id: int) -> Block:
+        return self._blocks[block_id] if block_id >= 0 else None
+
     def set_block_paths(
         self, current_block: Block, new_block: Block, is_false_path=False
     ):
@@ -391,69 +588,264 @@ class CFG:
             self.visited_nodes[instruction.node_id] = block.id
 
     def check_for_state_variables(self, block: Block, instruction: Node):
-        if instruction.state_variables_written:
-            [
-                block.add_state_variable_written(s_instruction)
-                for s_instruction in instruction.state_variables_written
-            ]
+        reads, writes = self.get_instruction_storage_accesses(instruction)
+        block.add_storage_accesses(reads, writes)
 
-        if instruction.state_variables_read:
-            [
-                block.add_state_variable_read(s_instruction)
-                for s_instruction in instruction.state_variables_read
-            ]
+    def intern_state_variable(self, name: str) -> int:
+        """
+        Small integer id of a state variable, used as its bit in the storage bitsets
+        """
+        if (variable_id := self._state_variable_ids.get(name)) is None:
+            variable_id = self._state_variable_ids[name] = len(self._state_variable_names)
+            self._state_variable_names.append(name)
+        return variable_id
 
-    def retrieve_function_args(self) -> list["LocalVariable"]:
-        return self.function.parameters
+    def get_state_variable_id(self, name: str) -> int:
+        return self._state_variable_ids.get(name)
 
-    def retrieve_storage_variables(self) -> list["StateVariable"]:
-        return self.contract.variables
+    def get_state_variable_names(self, bitset: int) -> List[str]:
+        return [
+            name
+            for variable_id, name in enumerate(self._state_variable_names)
+            if bitset >> variable_id & 1
+        ]
 
-    def retrieve_user_defined_data_structures(self) -> list["StructureContract"]:
-        return self.contract.structures
+    def get_instruction_storage_accesses(self, instruction: Node) -> Tuple[int, int]:
+        """Returns the state variables accessed by the instruction, computed once per node
 
+        Returns:
+            (int, int): bitsets of the state variables read and written
+        """
+        if (accesses := self._instruction_storage_accesses.get(instruction.node_id)) is None:
+            reads = 0
+            for variable in instruction.state_variables_read:
+                reads |= 1 << self.intern_state_variable(variable.name)
+
+            writes = 0
+            for variable in instruction.state_variables_written:
+                writes |= 1 << self.intern_state_variable(variable.name)
+
+            accesses = self._instruction_storage_accesses[instruction.node_id] = (
+                reads,
+                writes,
+            )
 
-def cfg_to_dot(
-    dir: str, sub_dir: str, base_dir: str, filename: str, starting_node: Block
-):
-    """
-        Export the function to a dot file. Useful for debugging.
-    Args:
-        filename (str)
-    """
+        return accesses
+
+    def is_storage_variable_accessed_by(self, instruction: Node, name: str) -> bool:
+        """
+        Single bit test, is the state variable read or written by the instruction
+        """
+        # interns the variables of the instruction, it may be the first to access this one
+        reads, writes = self.get_instruction_storage_accesses(instruction)
 
-    # Create the directory if it doesn't exist
-    dir_path = os.path.join(
-        "output", dir.replace(".sol", ""), sub_dir, base_dir, "cfgs"
-    )
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
+        if (variable_id := self.get_state_variable_id(name)) is None:
+            return False
 
-    # Create the file path
-    file_path = os.path.join(dir_path, filename)
+        return bool((reads | writes) >> variable_id & 1)
 
-    with open(f"{file_path}.dot", "w", encoding="utf8") as f:
-        f.write("digraph{\n")
-        cfg_to_dot_recursive(f, starting_node, [])
-        f.write("}\n")
+    def get_loop_storage_accesses(self, header_id: int) -> Tuple[int, int]:
+        """Returns the union of the storage accesses of the blocks of the loop
 
+        Returns:
+            (int, int): bitsets of the state variables read and written, (0, 0) if not a loop
+        """
+        return self._loop_storage_accesses.get(header_id, (0, 0))
 
-def cfg_to_dot_recursive(file, block: Block, visited_list):
-    if not block:
-        return
+    def is_storage_accessed_in_loop(self, block_id: int) -> bool:
+        """
+        Does the innermost loop containing the block access any state variable,
+        blocks outside of the computed loop structure are assumed to
+        """
+        if (header := self.get_innermost_loop(block_id)) is None:
+            return True
 
-    file.write(
-        f'{str(block.id)}[label="{block.id} {[str(instruction) for instruction in block.instructions]}"];\n'
-    )
+        reads, writes = self.get_loop_storage_accesses(header.id)
+        return bool(reads | writes)
 
-    if block.true_path:
-        # FIXME this causes double arrows
-        file.write(f'{block.id}->{block.true_path.id}[label="True"];\n')
+    def compute_loop_structure(self):
+        """
+        Computes, once the CFG is built, the dominator tree, the natural loops
+        and the loop-nest forest, so scope queries don't walk the CFG
+        """
+        block_count = len(self._blocks)
 
-        if block.true_path.id not in visited_list:
-            visited_list.append(block.true_path.id)
-            cfg_to_dot_recursive(file, block.true_path, visited_list)
+        successors = [
+            [
+                successor
+                for successor in (
+                    self._true_successors[block_id],
+                    self._false_successors[block_id],
+                )
+                if successor >= 0
+            ]
+            for block_id in range(block_count)
+        ]
+
+        predecessors = [[] for _ in range(block_count)]
+        for block_id, block_successors in enumerate(successors):
+            for successor in block_successors:
+                predecessors[successor].append(block_id)
+
+        # reverse postorder from the head
+        postorder = []
+        visited = bytearray(block_count)
+        visited[self._head.id] = 1
+        stack = [(self._head.id, iter(successors[self._head.id]))]
+        while stack:
+            block_id, pending = stack[-1]
+            successor = next(pending, None)
+            if successor is None:
+                stack.pop()
+                postorder.append(block_id)
+            elif not visited[successor]:
+                visited[successor] = 1
+                stack.append((successor, iter(successors[successor])))
+
+        order = array("i", [-1] * block_count)
+        for index, block_id in enumerate(postorder):
+            order[block_id] = index
+        reverse_postorder = postorder[::-1]
+
+        # Cooper, Harvey, Kennedy: A Simple, Fast Dominance Algorithm
+        idom = array("i", [-1] * block_count)
+        idom[self._head.id] = self._head.id
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while order[a] < order[b]:
+                    a = idom[a]
+                while order[b] < order[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block_id in reverse_postorder[1:]:
+                new_idom = -1
+                for predecessor in predecessors[block_id]:
+                    if idom[predecessor] < 0:
+                        continue
+                    new_idom = (
+                        predecessor
+                        if new_idom < 0
+                        else intersect(predecessor, new_idom)
+                    )
+
+                if idom[block_id] != new_idom:
+                    idom[block_id] = new_idom
+                    changed = True
+
+        # number the dominator tree, a dominates b iff b's interval is nested in a's
+        children = [[] for _ in range(block_count)]
+        for block_id in reverse_postorder[1:]:
+            children[idom[block_id]].append(block_id)
+
+        entry = array("i", [-1] * block_count)
+        exit = array("i", [-1] * block_count)
+        counter = 0
+        stack = [(self._head.id, False)]
+        while stack:
+            block_id, is_exit = stack.pop()
+            if is_exit:
+                exit[block_id] = counter
+            else:
+                entry[block_id] = counter
+                stack.append((block_id, True))
+                stack.extend((child, False) for child in reversed(children[block_id]))
+            counter += 1
+
+        self._immediate_dominators = idom
+        self._dominator_entry = entry
+        self._dominator_exit = exit
+
+        # natural loops: the target of a back edge dominates its source
+        loop_bodies: dict[int, set] = {}
+        for block_id in reverse_postorder:
+            for successor in successors[block_id]:
+                if not self.dominates(successor, block_id):
+                    continue
+
+                body = loop_bodies.setdefault(successor, {successor})
+                pending = [block_id]
+                while pending:
+                    current = pending.pop()
+                    if current in body:
+                        continue
+                    body.add(current)
+                    pending.extend(predecessors[current])
+
+        # outermost loops first, inner loops override the innermost loop of their blocks
+        innermost_loops = array("i", [-1] * block_count)
+        parent_loops = {}
+        for header in sorted(loop_bodies, key=lambda h: (-len(loop_bodies[h]), h)):
+            parent_loops[header] = innermost_loops[header]
+            for block_id in loop_bodies[header]:
+                innermost_loops[block_id] = header
+
+        self._loop_bodies = {
+            header: frozenset(body) for header, body in loop_bodies.items()
+        }
+        self._innermost_loops = innermost_loops
+        self._parent_loops = parent_loops
+
+        # storage summaries of every loop, available before symbolic execution
+        self._loop_storage_accesses = {}
+        for header, body in loop_bodies.items():
+            reads = writes = 0
+            for block_id in body:
+                reads |= self._blocks[block_id].storage_reads
+                writes |= self._blocks[block_id].storage_writes
+            self._loop_storage_accesses[header] = (reads, writes)
+
+    def dominates(self, dominator_id: int, block_id: int) -> bool:
+        """
+        O(1), blocks created after compute_loop_structure only dominate themselves
+        """
+        if dominator_id == block_id:
+            return True
+
+        if max(dominator_id, block_id) >= len(self._dominator_entry):
+            return False
+
+        entry, exit = self._dominator_entry, self._dominator_exit
+        return (
+            entry[dominator_id] >= 0
+            and entry[block_id] >= 0
+            and entry[dominator_id] <= entry[block_id]
+            and exit[block_id] <= exit[dominator_id]
+        )
+
+    def get_immediate_dominator(self, block_id: int) -> Block:
+        if block_id >= len(self._immediate_dominators) or block_id == self._head.id:
+            return None
+        return self.get_block(self._immediate_dominators[block_id])
+
+    def get_innermost_loop(self, block_id: int) -> Block:
+        """Returns the header of the innermost loop containing the block
+
+        Returns:
+            Block: loop header, None outside of loops
+        """
+        if block_id >= len(self._innermost_loops):
+            return None
+        return self.get_block(self._innermost_loops[block_id])
+
+    def get_parent_loop(self, header_id: int) -> Block:
+        """Returns the header of the loop enclosing the given loop
+
+        Returns:
+            Block: loop header, None for outermost loops
+        """
+        return self.get_block(self._parent_loops.get(header_id, -1))
+
+    def retrieve_function_args(self) -> list["LocalVariable"]:
+        return self.function.parameters
+
+    def retrieve_storage_variables(self) -> list["StateVariable"]:
+        return self.contract.variables
+
+    def retrieve_user_defined_data_structures(self) -> list["StructureContract"]:
+        return self.contract.structures
 
-    if block.false_path:
-        file.write(f'{block.id}->{block.false_path.id}[label="False"];\n')
-        cfg_to_dot_recursive(file, block.false_path, visited_list)
@@ -0,0 +1,201 @@
+import os
+import json
+from typing import Dict, IO, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from modules.cfg_builder.block import Block
+
+def walk_cfg(head: Block) -> Iterator[Tuple[Block, List[Tuple[int, int, str]]]]:
+    """
+    Iterative traversal of the CFG, yields every reachable block once
+    along with its outgoing edges, (source id, target id, label)
+    """
+    if not head:
+        return
+
+    visited = {head.id}
+    stack = [head]
+
+    while stack:
+        block = stack.pop()
+
+        successors = [
+            (successor, label)
+            for successor, label in [(block.true_path, "True"), (block.false_path, "False")]
+            if successor
+        ]
+
+        # true paths are explored first
+        for successor, _ in reversed(successors):
+            if successor.id not in visited:
+                visited.add(successor.id)
+                stack.append(successor)
+
+        yield block, [(block.id, successor.id, label) for successor, label in successors]
+
+
+def block_label(block: Block) -> str:
+    return f"{block.id} [{', '.join(repr(str(instruction)) for instruction in block.instructions)}]"
+
+
+class CfgExporter:
+    """
+    CfgExporter class
+
+    Exports CFGs for debugging, either one .dot file per function
+    or one buffered JSON-lines/GraphML file per contract
+
+    """
+
+    instance = None
+
+    _format: str = "dot"
+
+    # open per-contract streams of the current file, by path
+    _streams: Dict[str, IO] = {}
+
+    @property
+    def format(self) -> str:
+        return self._format
+
+    @staticmethod
+    def get_instance():
+        if not CfgExporter.instance:
+            CfgExporter.instance = CfgExporter()
+        return CfgExporter.instance
+
+    def init_instance(self, format: str = "dot"):
+        self._format = format
+
+    def export(
+        self, dir: str, sub_dir: str, base_dir: str, filename: str, starting_node: Block
+    ):
+        """
+        Export the function given its file, contract, function and graph name
+        """
+        if self.format == "dot":
+            cfg_to_dot(dir, sub_dir, base_dir, filename, starting_node)
+            return
+
+        stream = self.get_stream(dir, sub_dir)
+
+        if self.format == "jsonl":
+            write_jsonl_graph(stream, base_dir, filename, starting_node)
+        else:
+            write_graphml_graph(stream, base_dir, filename, starting_node)
+
+    def get_stream(self, dir: str, sub_dir: str) -> IO:
+        dir_path = os.path.join("output", dir.replace(".sol", ""), sub_dir)
+        path = os.path.join(dir_path, f"cfgs.{self.format}")
+
+        if (stream := self._streams.get(path)) is None:
+            if not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+
+            # truncated on the first export of the run
+            stream = self._streams[path] = open(
+                path, "w", encoding="utf8", buffering=1024 * 1024
+            )
+
+            if self.format == "graphml":
+                stream.write(
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                    '<key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+                    '<key id="path" for="edge" attr.name="path" attr.type="string"/>\n'
+                    '<key id="function" for="graph" attr.name="function" attr.type="string"/>\n'
+                )
+
+        return stream
+
+    def close(self):
+        """
+        Flush and close the streams once the file is analysed
+        """
+        for stream in self._streams.values():
+            if self.format == "graphml":
+                stream.write("</graphml>\n")
+            stream.close()
+
+        self._streams = {}
+
+
+def cfg_to_dot(
+    dir: str, sub_dir: str, base_dir: str, filename: str, starting_node: Block
+):
+    """
+        Export the function to a dot file. Useful for debugging.
+    Args:
+        filename (str)
+    """
+
+    # Create the directory if it doesn't exist
+    dir_path = os.path.join(
+        "output", dir.replace(".sol", ""), sub_dir, base_dir, "cfgs"
+    )
+    if not os.path.exists(dir_path):
+        os.makedirs(dir_path)
+
+    # Create the file path
+    file_path = os.path.join(dir_path, filename)
+
+    with open(f"{file_path}.dot", "w", encoding="utf8") as f:
+        f.write("digraph{\n")
+
+        for block, edges in walk_cfg(starting_node):
+            f.write(f'{block.id}[label="{block_label(block)}"];\n')
+
+            for source, target, label in edges:
+                f.write(f'{source}->{target}[label="{label}"];\n')
+
+        f.write("}\n")
+
+
+def write_jsonl_graph(stream: IO, function: str, name: str, starting_node: Block):
+    """
+    One line per graph, blocks are written as they are reached
+    """
+    stream.write(f'{{"function": {json.dumps(function)}, "graph": {json.dumps(name)}, "blocks": [')
+
+    edges = []
+    for index, (block, block_edges) in enumerate(walk_cfg(starting_node)):
+        if index:
+            stream.write(", ")
+        stream.write(
+            json.dumps(
+                {
+                    "id": block.id,
+                    "instructions": [
+                        str(instruction) for instruction in block.instructions
+                    ],
+                }
+            )
+        )
+        edges.extend(block_edges)
+
+    stream.write(f"], \"edges\": {json.dumps(edges)}}}\n")
+
+
+def write_graphml_graph(stream: IO, function: str, name: str, starting_node: Block):
+    stream.write(
+        f'<graph id={quoteattr(name)} edgedefault="directed">'
+        f'<data key="function">{escape(function)}</data>\n'
+    )
+
+    for block, edges in walk_cfg(starting_node):
+        # node ids must be unique in the whole document, graphs of a contract share it
+        stream.write(
+            f'<node id="{name}:{block.id}"><data key="label">{escape(block_label(block))}</data></node>\n'
+        )
+
+        for source, target, label in edges:
+            stream.write(
+                f'<edge source="{name}:{source}" target="{name}:{target}">'
+                f'<data key="path">{label}</data></edge>\n'
+            )
+
+    stream.write("</graph>\n")
+
+
+# export the singleton
+cfgExporter = CfgExporter.get_instance()
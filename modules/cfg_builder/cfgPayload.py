@@ -0,0 +1,141 @@
+from typing import Dict, List
+
+from slither.core.cfg.node import Node
+from slither.core.declarations import Function, Contract
+
+from modules.cfg_builder.cfg import CFG
+from modules.code_optimizer.siphonNode import SiphonNode
+
+# bump when the payload layout changes
+CFG_PAYLOAD_VERSION = 2
+
+
+def cfg_to_payload(cfg: CFG) -> Dict:
+    """
+    Converts a built CFG into plain data that can be cached or sent to another process
+
+    Slither Nodes are referenced by their node_id and source span,
+    the span is checked again when rehydrating
+    """
+    return {
+        "version": CFG_PAYLOAD_VERSION,
+        "contract": cfg.contract.name,
+        "function": cfg.function.full_name,
+        "head": cfg.head.id,
+        "blocks": [
+            {
+                "instructions": [
+                    instruction_to_payload(instruction)
+                    for instruction in block.instructions
+                ],
+                "true_path": cfg.true_successors[block.id],
+                "false_path": cfg.false_successors[block.id],
+                "prev_block": cfg.predecessors[block.id],
+                "storage_reads": block.storage_reads,
+                "storage_writes": block.storage_writes,
+                "reachability": list(block._reachability),
+            }
+            for block in cfg.blocks
+        ],
+        "visited_nodes": list(cfg.visited_nodes.items()),
+        # bit positions of the storage bitsets
+        "state_variables": cfg.state_variable_names,
+    }
+
+
+def payload_to_cfg(
+    payload: Dict, filename: str, contract: Contract, function: Function
+) -> CFG:
+    """
+    Rebuilds a CFG against the compilation unit, without traversing the Slither nodes again
+
+    Raises ValueError if the payload doesn't match the function
+    """
+    if payload.get("version") != CFG_PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported CFG payload version {payload.get('version')}")
+
+    if (
+        payload["contract"] != contract.name
+        or payload["function"] != function.full_name
+    ):
+        raise ValueError(
+            f"CFG payload of {payload['contract']}.{payload['function']} "
+            f"does not match {contract.name}.{function.full_name}"
+        )
+
+    nodes = {node.node_id: node for node in function.nodes}
+
+    cfg = CFG(filename, contract, function)
+
+    # the declaration order may have changed, the bitsets are remapped to the new ids
+    bit_mapping = [
+        cfg.intern_state_variable(name) for name in payload["state_variables"]
+    ]
+
+    # the head is allocated by the constructor
+    for _ in payload["blocks"][1:]:
+        cfg.allocate_block()
+
+    for block, block_payload in zip(cfg.blocks, payload["blocks"]):
+        for instruction_payload in block_payload["instructions"]:
+            block.add_instruction(payload_to_instruction(instruction_payload, nodes))
+
+        cfg.true_successors[block.id] = block_payload["true_path"]
+        cfg.false_successors[block.id] = block_payload["false_path"]
+        cfg.predecessors[block.id] = block_payload["prev_block"]
+
+        block.add_storage_accesses(
+            remap_bitset(block_payload["storage_reads"], bit_mapping),
+            remap_bitset(block_payload["storage_writes"], bit_mapping),
+        )
+        block._reachability.extend(block_payload["reachability"])
+
+    cfg.visited_nodes.update(
+        (node_id, block_id) for node_id, block_id in payload["visited_nodes"]
+    )
+
+    cfg.compute_loop_structure()
+
+    return cfg
+
+
+def remap_bitset(bitset: int, bit_mapping: List[int]) -> int:
+    remapped = 0
+    for bit, variable_id in enumerate(bit_mapping):
+        if bitset >> bit & 1:
+            remapped |= 1 << variable_id
+    return remapped
+
+
+def instruction_to_payload(instruction) -> Dict:
+    if isinstance(instruction, SiphonNode):
+        return {
+            "expression": instruction.expression,
+            "original_instruction": instruction_to_payload(
+                instruction.original_instruction
+            ),
+        }
+
+    return {
+        "node_id": instruction.node_id,
+        "span": [instruction.source_mapping.start, instruction.source_mapping.length],
+    }
+
+
+def payload_to_instruction(payload: Dict, nodes: Dict[int, Node]):
+    if "expression" in payload:
+        return SiphonNode(
+            payload_to_instruction(payload["original_instruction"], nodes),
+            payload["expression"],
+        )
+
+    node = nodes.get(payload["node_id"])
+
+    # the source changed since the payload was created
+    if node is None or [
+        node.source_mapping.start,
+        node.source_mapping.length,
+    ] != payload["span"]:
+        raise ValueError(f"Node {payload['node_id']} does not match its source span")
+
+    return node
@@ -7,7 +7,7 @@ from slither.core.declarations import Function
 
 from modules.cfg_builder.cfg import CFG
 from modules.cfg_builder.block import Block
-from modules.slither.slitherSingleton import slitherSingleton
+from modules.code_optimizer.sourceIndex import sourceIndexCache
 
 
 class CodeGenerator:
@@ -136,7 +136,7 @@ class CodeGenerator:
                 )
             ):
                 # else branch exists
-                is_loop_end = current_block.instructions[-1].type == NodeType.ENDLOOP
+                is_loop_end = current_block.last_instruction.type == NodeType.ENDLOOP
                 current_block = false_queue.pop()
 
                 # loop false branches are not ELSE
@@ -162,7 +162,8 @@ class CodeGenerator:
 
             # Mark the block as generated to avoid duplicate code generation from false paths
             current_block.was_converted_to_source = True
-            for index, instruction in enumerate(current_block.instructions):
+            instructions = current_block.instructions
+            for index, instruction in enumerate(instructions):
                 # Slither Nodes can reference the same line multiple times,
                 # for example, the "for loop" init, condition, and update.
                 # in those cases, the line only needs to be generated once
@@ -171,8 +172,8 @@ class CodeGenerator:
                     # IFLOOP instruction handles all of them
                     # modified for loops are inline by siphon nodes and trailing instructions are removed here
                     if (
-                        index + 1 != len(current_block.instructions)
-                        and current_block.instructions[index + 1].type
+                        index + 1 != len(instructions)
+                        and instructions[index + 1].type
                         in [NodeType.STARTLOOP, NodeType.ENDLOOP]
                     ) or instruction.type == NodeType.STARTLOOP:
                         continue
@@ -207,22 +208,26 @@ class CodeGenerator:
 
 
 def get_source_line_from_node(filename: str, instruction: Node):
-    raw_line = slitherSingleton.slither.crytic_compile.get_code_from_line(
-        filename, instruction.source_mapping.lines[0]
-    ).decode()
+    source_index = sourceIndexCache.get_index(filename)
+    line = instruction.source_mapping.lines[0]
 
-    start = instruction.source_mapping.starting_column - 1
-    end = instruction.source_mapping.ending_column - 1
-
-    # barebones information from line
+    # barebones information from line, columns are byte offsets
     # ex: if (x < 60) -> x < 60
-    source_line = raw_line[start:end]
+    source_line = str(
+        source_index.get_columns(
+            line,
+            instruction.source_mapping.starting_column,
+            instruction.source_mapping.ending_column,
+        ),
+        "utf8",
+    )
 
     match instruction.type:
         case NodeType.IF:
             return f"if ({source_line}) {{"
         case NodeType.IFLOOP:
             # match content inside parentheses
+            raw_line = str(source_index.get_line(line), "utf8")
             pattern = r"\((?:[^()]*\([^()]*\)|[^()]+)\)"
             content = re.findall(pattern, raw_line)[0]
             return f"for{content} {{"
@@ -8,7 +8,7 @@ from slither.core.solidity_types.type import Type
 from slither.core.solidity_types.array_type import ArrayType
 from slither.core.solidity_types.mapping_type import MappingType
 
-from modules.cfg_builder.cfg import CFG, Block, cfg_to_dot
+from modules.cfg_builder.cfg import CFG, Block
 
 from modules.pattern_matcher.patternMatcher import (
     Pattern,
@@ -89,6 +89,9 @@ class Optimizer:
         # CFG to analyse
         self._cfg = cfg
 
+        # placeholders are declared in the function body, and block ids restart at 0 in every CFG
+        self._placeholder_variables = {}
+
         # Patterns to optimize
         self._patterns = patterns
 
@@ -124,22 +127,16 @@ class Optimizer:
                 )
 
         if self.export_cfg:
-            cfg_to_dot(
-                self.filename,
-                self.cfg.contract.name,
-                self.cfg.function.name,
-                f"{self.cfg.function.name}-optimized",
-                self.cfg.head,
-            )
+            self.cfg.export(f"{self.cfg.function.name}-optimized")
 
         # return the optimized cfg
         return self.cfg
 
     def handle_redundant_code(self, pattern: RedundantCodePattern):
         # find IF condition
-        for i in range(len(pattern.block._instructions) - 1, -1, -1):
-            if pattern.block._instructions[i].type == NodeType.IF:
-                pattern.block._instructions.pop(i)
+        for i in range(pattern.block.instruction_count - 1, -1, -1):
+            if pattern.block.get_instruction(i).type == NodeType.IF:
+                pattern.block.remove_instruction(i)
                 break
 
         # the false path is now the true path, IF it exists
@@ -152,7 +149,7 @@ class Optimizer:
     def handle_opaque_predicate(self, pattern: OpaquePredicatePattern):
         # last instruction is the IF condition
         # no need to have since it's always true
-        pattern.block._instructions.pop()
+        pattern.block.remove_instruction()
 
         # traverse tree and find corresponding ENDIF and remove it.
         self.remove_trailing_end_if(pattern.block)
@@ -237,7 +234,7 @@ class Optimizer:
             func_name = str(function)
 
             # assume only one return type
-            return_type = function.return_type[0]
+            return_type = self._cfg.function_summaries.get_summary(function).return_type[0]
 
             # generate unique name for placeholder
             placeholder_variable_name = self.generate_unique_name(func_name)
@@ -300,16 +297,11 @@ class Optimizer:
 
     def get_block_of_scope(self, pattern: Pattern) -> Block:
         """
-        Given a block scope, stored in the pattern,
-        traverse upwards in the CFG until the corresponding Block is found and return it
-        """
+        Given a block scope, stored in the pattern, return the corresponding Block
 
-        # when the current block has the id of the current scope return it
-        current_block = pattern.block
-        while current_block.id != pattern.current_scope:
-            current_block = current_block.prev_block
-
-        return current_block
+        Scopes are loop header ids, which index the CFG blocks directly
+        """
+        return self._cfg.blocks[pattern.current_scope]
 
     def generate_unique_name(self, name: str):
         """
@@ -383,20 +375,9 @@ class Optimizer:
 
         placeholder_scope = self._placeholder_variables.get(variable_name)
 
-        # starting on 'start_block', check if 'placeholder_block' is reachable
-        # if it is, then a placeholder was already generate in an higher scope
-        current_block = start_block
-        while current_block:
-            if current_block.id == placeholder_scope:
-                return False
-
-            if not current_block.prev_block:
-                break
-
-            current_block = current_block.prev_block
-
-        # if block is not found then placeholder was never generated
-        return True
+        # if the block of the placeholder dominates 'start_block',
+        # then a placeholder was already generated in an higher scope on every path
+        return not self._cfg.dominates(placeholder_scope, start_block.id)
 
     def should_generate_write_back(self, variable_type: Type, variable_name: str):
         if self.is_method_over_array(variable_name):
@@ -421,7 +402,11 @@ class Optimizer:
         assignment_instruction = SiphonNode(pattern.instruction, assignment)
 
         # find start of loop
-        loop_start_index = self.find_begin_loop_index(block_of_scope.instructions)
+        loop_start_index = (
+            self.find_begin_loop_index(block_of_scope.instructions)
+            if block_of_scope.has_loop_start
+            else -1
+        )
 
         insert_index = loop_start_index - 1
 
@@ -429,7 +414,7 @@ class Optimizer:
         insert_index = max(insert_index, 0)
 
         # insert assignment before BEGIN_LOOP in block
-        block_of_scope._instructions.insert(insert_index, assignment_instruction)
+        block_of_scope.insert_instruction(insert_index, assignment_instruction)
 
     def push_write_back_to_block(
         self, pattern: Pattern, block_of_scope: Block, write_back: str
@@ -439,13 +424,11 @@ class Optimizer:
         """
         write_back_instruction = SiphonNode(pattern.instruction, write_back)
 
-        if not block_of_scope._false_path:
-            block_of_scope._false_path = Block()
+        if not block_of_scope.false_path:
+            block_of_scope.false_path = self._cfg.allocate_block()
 
         # insert write-back after loop in block (false path)
-        block_of_scope._false_path._instructions = [
-            write_back_instruction
-        ] + block_of_scope._false_path._instructions
+        block_of_scope.false_path.insert_instruction(0, write_back_instruction)
 
     def push_modified_line_to_block(self, pattern: Pattern, modified_source_line: str):
         """
@@ -458,7 +441,7 @@ class Optimizer:
         )
 
         # replace instruction in block
-        pattern.block._instructions[instruction_index] = modified_instruction
+        pattern.block.replace_instruction(instruction_index, modified_instruction)
 
     def generate_storage_access(
         self,
@@ -665,15 +648,15 @@ class Optimizer:
                 return
 
             # handle nested IFs
-            if current_block._instructions:
-                if current_block._instructions[-1].type == NodeType.IF:
+            if current_block.last_instruction is not None:
+                if current_block.last_instruction.type == NodeType.IF:
                     if_depth += 1
-                elif current_block._instructions[-1].type == NodeType.ENDIF:
+                elif current_block.last_instruction.type == NodeType.ENDIF:
                     if_depth -= 1
 
             # corresponding ENDIF found, remove it
             if if_depth == 0:
-                current_block._instructions.pop()
+                current_block.remove_instruction()
                 return
 
             current_block = current_block.true_path
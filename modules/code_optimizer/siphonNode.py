@@ -7,6 +7,14 @@ class SiphonNode:
 
     """
 
+    __slots__ = ("_original_instruction", "_expression")
+
+    # mimic Node type
+    _type = "SIPHON_NODE"
+
+    # mimic Node node_id
+    _node_id = -1
+
     def __init__(self, instruction: Node, expression: str):
         # in the case of new instructions holds the Node that originated it
         self._original_instruction = instruction
@@ -14,12 +22,6 @@ class SiphonNode:
         # hold the new/reconstructed instruction
         self._expression = expression
 
-        # mimic Node type
-        self._type = "SIPHON_NODE"
-
-        # mimic Node node_id
-        self._node_id = -1
-
     @property
     def original_instruction(self):
         return self._original_instruction
@@ -0,0 +1,106 @@
+import re
+import mmap
+from array import array
+from typing import Dict
+
+
+class SourceIndex:
+    """
+    SourceIndex class
+
+    Memory-mapped source file with the byte offset of every line start,
+    lines and column slices are O(1) views into the mapping
+
+    """
+
+    def __init__(self, filename: str):
+        self._filename = filename
+
+        with open(filename, "rb") as f:
+            # empty files can't be mapped
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self._mmap = None
+
+        self._view = memoryview(self._mmap if self._mmap is not None else b"")
+
+        # same line breaks as crytic-compile (bytes.splitlines)
+        self._line_starts = array("Q", [0])
+        if self._mmap is not None:
+            self._line_starts.extend(
+                match.end() for match in re.finditer(rb"\r\n|\r|\n", self._mmap)
+            )
+
+        # a trailing line break doesn't start a new line
+        if len(self._line_starts) == 1 or self._line_starts[-1] != len(self._view):
+            self._line_starts.append(len(self._view))
+
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def line_count(self) -> int:
+        return len(self._line_starts) - 1
+
+    def get_line(self, line: int) -> memoryview:
+        """Line number starting at 1, line break included
+
+        Returns:
+            memoryview: view of the line
+        """
+        return self._view[self._line_starts[line - 1] : self._line_starts[line]]
+
+    def get_columns(self, line: int, start: int, end: int) -> memoryview:
+        """Byte columns of the line, starting at 1 and end excluded as in slither's source mappings.
+        The view never runs past the line break, the ending column of a node
+        spanning several lines belongs to its last line
+
+        Returns:
+            memoryview: view of the columns
+        """
+        offset, line_end = self._line_starts[line - 1], self._line_starts[line]
+        return self._view[
+            min(offset + start - 1, line_end) : min(offset + end - 1, line_end)
+        ]
+
+    def close(self):
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+
+class SourceIndexCache:
+    """
+    SourceIndexCache class
+
+    One SourceIndex per file, shared by the code generator and the optimizer
+
+    """
+
+    instance = None
+
+    _indexes: Dict[str, SourceIndex] = {}
+
+    @staticmethod
+    def get_instance():
+        if not SourceIndexCache.instance:
+            SourceIndexCache.instance = SourceIndexCache()
+        return SourceIndexCache.instance
+
+    def get_index(self, filename: str) -> SourceIndex:
+        if (index := self._indexes.get(filename)) is None:
+            index = self._indexes[filename] = SourceIndex(filename)
+        return index
+
+    def release(self, filename: str):
+        """
+        Unmap the file once its analysis is complete
+        """
+        if (index := self._indexes.pop(filename, None)) is not None:
+            index.close()
+
+
+# export the singleton
+sourceIndexCache = SourceIndexCache.get_instance()
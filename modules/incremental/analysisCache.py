@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import glob
+import hashlib
+from typing import Dict, List, Tuple
+
+from slither.core.declarations import Function, Contract
+
+from modules.pattern_matcher.solverBudget import solverBudget
+
+
+class AnalysisCache:
+    """
+    AnalysisCache class
+
+    Stores the outputs of each analysed function between runs, keyed on a fingerprint of the function.
+    Unchanged functions reuse their previous patterns.txt and -optimized.sol instead of
+    rebuilding the CFG and re-running SE
+
+    """
+
+    instance = None
+
+    _cache_dir: str = os.path.join(".siphon_cache", "analysis")
+
+    _enabled: bool = True
+
+    # counters of the current process
+    _hits: int = 0
+    _misses: int = 0
+
+    # hash of the pipeline sources, a new Siphon version invalidates every entry
+    _analysis_version: str = None
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @staticmethod
+    def get_instance():
+        if not AnalysisCache.instance:
+            AnalysisCache.instance = AnalysisCache()
+        return AnalysisCache.instance
+
+    def init_instance(self, cache_dir: str = None, enabled: bool = True):
+        if cache_dir:
+            self._cache_dir = os.path.join(cache_dir, "analysis")
+
+        self._enabled = enabled
+
+    def partition(
+        self, filename: str, targets: List[Tuple[Contract, Function]]
+    ) -> Tuple[List[Dict], List[Tuple[Contract, Function]]]:
+        """Splits the targets into unchanged and changed functions.
+        The outputs of the unchanged functions are restored in the output directory
+
+        Returns:
+            (list(dict), list(targets)): Summaries of the reused functions, functions to analyse
+        """
+        if not self.enabled:
+            return [], targets
+
+        reused, changed = [], []
+        for contract, function in targets:
+            entry = self.load(filename, contract, function)
+
+            if entry is None:
+                self._misses += 1
+                changed.append((contract, function))
+                continue
+
+            self._hits += 1
+            self.restore_outputs(entry)
+            reused.append(entry["summary"])
+
+        return reused, changed
+
+    def load(self, filename: str, contract: Contract, function: Function) -> Dict:
+        entry_path = self.get_entry_path(filename, contract, function)
+
+        try:
+            with open(entry_path, "r", encoding="utf8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("fingerprint") != fingerprint_function(contract, function):
+            return None
+
+        return entry
+
+    def store(self, filename: str, contract: Contract, function: Function, summary: Dict):
+        """
+        Store the outputs of an analysed function, must be called after the code generation
+        """
+        if not self.enabled:
+            return
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        entry = {
+            "fingerprint": fingerprint_function(contract, function),
+            "summary": summary,
+            "outputs": {
+                output: read_file(os.path.join(summary["output_dir"], output))
+                for output in get_output_files(summary)
+            },
+        }
+
+        entry_path = self.get_entry_path(filename, contract, function)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+    def restore_outputs(self, entry: Dict):
+        output_dir = entry["summary"]["output_dir"]
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        for output, content in entry["outputs"].items():
+            if content is None:
+                continue
+
+            with open(os.path.join(output_dir, output), "w", encoding="utf8") as f:
+                f.write(content)
+
+    def get_entry_path(self, filename: str, contract: Contract, function: Function):
+        key = hashlib.sha256(
+            f"{os.path.abspath(filename)}:{contract.name}:{function.full_name}".encode()
+        ).hexdigest()
+
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get_analysis_version(self) -> str:
+        if self._analysis_version is None:
+            modules_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+            version = hashlib.sha256()
+            for path in sorted(
+                glob.glob(os.path.join(modules_dir, "**", "*.py"), recursive=True)
+            ):
+                with open(path, "rb") as f:
+                    version.update(f.read())
+
+            self._analysis_version = version.hexdigest()
+
+        return self._analysis_version
+
+
+def fingerprint_function(contract: Contract, function: Function) -> str:
+    """
+    Fingerprint of everything the analysis of a function depends on:
+    its normalized source, its node structure, the contract storage layout,
+    its callees and modifiers, the compiler and the solver budget
+    """
+    fingerprint = hashlib.sha256()
+
+    fingerprint.update(analysisCache.get_analysis_version().encode())
+    fingerprint.update(function.compilation_unit.compiler_version.version.encode())
+
+    # results of a function over budget are only valid for the same limits
+    fingerprint.update(solverBudget.settings.encode())
+    fingerprint.update(get_normalized_source(function).encode())
+
+    for node in function.nodes:
+        sons = [son.node_id for son in node.sons]
+        fingerprint.update(
+            f"{node.node_id}:{node.type.name}:{node.expression}:{sons}".encode()
+        )
+
+    # every storage variable is part of the symbolic table of the function
+    for variable in contract.state_variables:
+        fingerprint.update(f"{variable.name}:{variable.type}".encode())
+
+    # P5 depends on the body of the called functions, and theirs on their own callees.
+    # the transitive closure also goes through the modifiers
+    callees = [
+        callee for callee in function.all_internal_calls() if isinstance(callee, Function)
+    ]
+
+    dependencies = {}
+    for dependency in [function] + callees:
+        if dependency is not function:
+            dependencies[dependency.canonical_name] = dependency
+
+        for modifier in dependency.modifiers:
+            dependencies[modifier.canonical_name] = modifier
+
+    for canonical_name, dependency in sorted(dependencies.items()):
+        fingerprint.update(
+            f"{canonical_name}:{get_normalized_source(dependency)}".encode()
+        )
+
+    return fingerprint.hexdigest()
+
+
+def get_normalized_source(function: Function) -> str:
+    source_mapping = function.source_mapping
+
+    source_code = function.compilation_unit.core.source_code.get(
+        source_mapping.filename.absolute, ""
+    )
+
+    # offsets are in bytes
+    span = source_code.encode()[
+        source_mapping.start : source_mapping.start + source_mapping.length
+    ].decode(errors="replace")
+
+    # formatting changes don't change the analysis
+    return re.sub(r"\s+", " ", span).strip()
+
+
+def get_output_files(summary: Dict) -> List[str]:
+    outputs = ["patterns.txt"]
+
+    if summary["optimized"]:
+        outputs.append(f"{summary['function']}-optimized.sol")
+
+    return outputs
+
+
+def read_file(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# export the singleton
+analysisCache = AnalysisCache.get_instance()
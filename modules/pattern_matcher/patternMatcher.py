@@ -5,15 +5,23 @@ from slither.core.cfg.node import Node
 from slither.core.declarations import Function
 
 from modules.cfg_builder.block import Block
+from modules.slither.functionSummaries import ContractSummaries
+from modules.pattern_matcher.queryCache import queryCache
+from modules.pattern_matcher.solverBudget import FunctionBudget, solverBudget
 from modules.symbolic_execution_engine.symbolicTable import SymbolicTable, SymbolType
 from modules.pattern_matcher.patterns import *
 
 
 class PatternMatcher:
     def __init__(self):
-        # Z3 solver
+        # Z3 solver, incremental along the explored path
+        # the SE engine pushes a scope per branch and asserts only its new constraint
         self._solver: Solver = Solver()
 
+        # budget of the function, queries over it are unknown
+        self._budget: FunctionBudget = solverBudget.start_function()
+        self._query_timeout: int = None
+
         # pattern candidates. Debug purposes
         self._pattern_candidates: list[Pattern] = []
 
@@ -41,6 +49,31 @@ class PatternMatcher:
         output += "\n"
         return output
 
+    def check(self, condition, path_contraints) -> CheckSatResult:
+        """
+        Every query of the solver goes through the process-wide query cache,
+        within the budget of the function
+        """
+        was_exhausted = self._budget.exhausted
+
+        if (query_timeout := self._budget.consume_query()) is None:
+            if not was_exhausted:
+                solverBudget.record_exhausted()
+            solverBudget.record_unknown()
+            return unknown
+
+        # 0 disables the timeout, the Z3 default is the max uint
+        query_timeout = query_timeout or 4294967295
+        if query_timeout != self._query_timeout:
+            self.solver.set("timeout", query_timeout)
+            self._query_timeout = query_timeout
+
+        result = queryCache.check(self.solver, condition, path_contraints)
+        if result == unknown:
+            solverBudget.record_unknown()
+
+        return result
+
     # PATTERN 1: Redundant code
     # check if a branch is unsatisfiable (UNSAT)
     def p1_redundant_code(
@@ -56,16 +89,13 @@ class PatternMatcher:
 
         Check if a branch is unsatisfiable (UNSAT)
         """
-        # Get the current path constraints
-
-        check_constraint = condition
+        # the path constraints are already asserted, the condition is only assumed
+        result = self.check(condition, path_contraints)
 
-        if path_contraints:
-            check_constraint = And(*path_contraints, condition)
+        # unknown (timeout or over budget) is explored and never reported
+        is_condition_sat = result != unsat
 
-        is_condition_sat = self.solver.check(check_constraint) == sat
-
-        if not skip_pattern and not is_condition_sat:
+        if not skip_pattern and result == unsat:
             pattern = RedundantCodePattern(
                 block, instruction, condition, path_contraints
             )
@@ -93,10 +123,8 @@ class PatternMatcher:
 
         # check if the branch conditions is a tautology
         # by proving that the negation of the implication is unsat
-        premise = And(path_contraints)
-        implication = Implies(premise, condition)
-
-        solver_result = self.solver.check(Not(implication))
+        # Not(Implies(path, condition)) is path AND Not(condition), the path is already asserted
+        solver_result = self.check(Not(condition), path_contraints)
 
         if not skip_pattern and solver_result == unsat:
             pattern = OpaquePredicatePattern(
@@ -121,11 +149,13 @@ class PatternMatcher:
 
         Check if a variable is being read/written to inside a loop
         """
+        # the variables of loops without any storage access are not sanitized one by one
         if (
-            self.is_storage_variable_accessed(
-                instruction, variable_name, loop_scope, symbolic_table
+            loop_scope
+            and block.cfg.is_storage_accessed_in_loop(block.id)
+            and self.is_storage_variable_accessed(
+                block, instruction, variable_name, loop_scope, symbolic_table
             )
-            and loop_scope
         ):
             existing_pattern = self.get_pattern_by_instruction_and_type(
                 instruction, PatternType.EXPENSIVE_OPERATION_IN_LOOP
@@ -159,7 +189,7 @@ class PatternMatcher:
         instruction: Node,
         function_call,
         symbolic_table: SymbolicTable,
-        functions: list["Function"],
+        summaries: ContractSummaries,
         loop_scope: list,
     ):
         """
@@ -170,13 +200,15 @@ class PatternMatcher:
         """
         sanitized_function_name, func_args = self.extract_function_info(function_call)
 
-        function = self.get_function_by_name(sanitized_function_name, functions)
+        summary = summaries.get_by_name(sanitized_function_name)
 
         # strict check to avoid side-effects from nested function calls or state changes
         # also safeguards against functions outside the contract
-        if not function or self.has_internal_calls(function) or not function.pure:
+        if not summary or summary.makes_calls or not summary.is_pure:
             return
 
+        function = summary.function
+
         # get symbols in the current scope
         loop_bounded_symbols = symbolic_table.get_symbols_by_scope(loop_scope[-1])
         tainted_symbols = symbolic_table.get_tainted_symbols_in_scope(loop_scope[-1])
@@ -392,6 +424,7 @@ class PatternMatcher:
 
     def is_storage_variable_accessed(
         self,
+        block: Block,
         instruction: Node,
         variable_name: str,
         loop_scope: list,
@@ -404,10 +437,8 @@ class PatternMatcher:
 
         # top-level shallow check for mappings and lists
         # this first condition only asserts that the mapping or list was accessed, not the specific element
-        if any(
-            s_variable.name == sanitized_variable_name
-            for s_variable in instruction.state_variables_written
-            + instruction.state_variables_read
+        if block.cfg.is_storage_variable_accessed_by(
+            instruction, sanitized_variable_name
         ):
             symbolic_variable = symbolic_table.get_symbol(sanitized_variable_name)
 
@@ -477,21 +508,6 @@ class PatternMatcher:
 
         return None, []
 
-    def get_function_by_name(self, function_name: str, functions: list) -> Function:
-        function = filter(lambda function: function.name == function_name, functions)
-
-        return next(function, None)
-
-    def has_internal_calls(self, function: Function):
-        return (
-            function.internal_calls
-            or function.solidity_calls
-            or function.low_level_calls
-            or function.high_level_calls
-            or function.library_calls
-            or function.external_calls_as_expressions
-        )
-
     def are_func_args_loop_bounded(self, loop_bounded_symbols: list, func_args: list):
         loop_bounded_names = [symbol.name for symbol in loop_bounded_symbols]
         return all(arg not in loop_bounded_names for arg in func_args)
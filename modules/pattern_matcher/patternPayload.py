@@ -0,0 +1,171 @@
+import os
+import json
+from typing import Dict, List, Tuple
+
+from slither.core.declarations import Function, Contract
+
+from modules.cfg_builder.cfg import CFG
+from modules.cfg_builder.cfgPayload import cfg_to_payload, payload_to_cfg
+from modules.incremental.analysisCache import fingerprint_function
+from modules.pattern_matcher.patterns import (
+    Pattern,
+    PatternType,
+    RedundantCodePattern,
+    OpaquePredicatePattern,
+    ExpensiveOperationInLoopPattern,
+    LoopInvariantOperationPattern,
+    LoopInvariantConditionPattern,
+)
+
+
+def pattern_to_payload(pattern: Pattern, cfg: CFG) -> Dict:
+    """
+    Converts a Pattern into plain data that can be sent to another process
+
+    Blocks are referenced by their id, which is dense and deterministic across processes,
+    and instructions by their node_id. Z3 conditions are kept in their textual form
+    """
+    payload = {
+        "pattern_type": pattern.pattern_type.value,
+        "block": pattern.block.id,
+        "instruction": pattern.instruction.node_id,
+    }
+
+    match pattern.pattern_type:
+        case PatternType.REDUNDANT_CODE | PatternType.OPAQUE_PREDICATE:
+            payload["condition"] = str(pattern.condition)
+            payload["path_constraints"] = [
+                str(constraint) for constraint in pattern.path_constraints
+            ]
+
+        case PatternType.EXPENSIVE_OPERATION_IN_LOOP:
+            payload["variables"] = list(pattern.variables)
+            payload["sanitized_variables"] = list(pattern.sanitized_variables)
+            payload["current_scope"] = pattern.current_scope
+
+        case PatternType.LOOP_INVARIANT_OPERATION:
+            payload["functions"] = [function.full_name for function in pattern.functions]
+            payload["func_calls"] = list(pattern.func_calls)
+            payload["func_args"] = list(pattern.func_args)
+            payload["current_scope"] = pattern.current_scope
+
+        case PatternType.LOOP_INVARIANT_CONDITION:
+            payload["condition"] = str(pattern.condition)
+            payload["current_scope"] = pattern.current_scope
+
+    return payload
+
+
+def payload_to_pattern(payload: Dict, cfg: CFG) -> Pattern:
+    """
+    Rebuilds a Pattern against an identically built CFG of the same compilation unit
+    """
+    block = cfg.blocks[payload["block"]]
+    instruction = next(
+        node for node in cfg.function.nodes if node.node_id == payload["instruction"]
+    )
+
+    match PatternType(payload["pattern_type"]):
+        case PatternType.REDUNDANT_CODE:
+            return RedundantCodePattern(
+                block, instruction, payload["condition"], payload["path_constraints"]
+            )
+
+        case PatternType.OPAQUE_PREDICATE:
+            return OpaquePredicatePattern(
+                block, instruction, payload["condition"], payload["path_constraints"]
+            )
+
+        case PatternType.EXPENSIVE_OPERATION_IN_LOOP:
+            pattern = ExpensiveOperationInLoopPattern(
+                block,
+                instruction,
+                None,
+                None,
+                payload["current_scope"],
+            )
+            pattern._variables = payload["variables"]
+            pattern._sanitized_variables = payload["sanitized_variables"]
+            return pattern
+
+        case PatternType.LOOP_INVARIANT_OPERATION:
+            pattern = LoopInvariantOperationPattern(
+                block,
+                instruction,
+                None,
+                None,
+                payload["func_args"],
+                payload["current_scope"],
+            )
+            summaries = [
+                cfg.function_summaries.get_by_signature(full_name)
+                for full_name in payload["functions"]
+            ]
+            if None in summaries:
+                raise ValueError(f"Functions {payload['functions']} not found")
+
+            pattern._functions = [summary.function for summary in summaries]
+            pattern._func_calls = payload["func_calls"]
+            return pattern
+
+        case PatternType.LOOP_INVARIANT_CONDITION:
+            return LoopInvariantConditionPattern(
+                block,
+                instruction,
+                payload["condition"],
+                payload["current_scope"],
+            )
+
+
+def patterns_to_payloads(patterns: List[Pattern], cfg: CFG) -> List[Dict]:
+    return [pattern_to_payload(pattern, cfg) for pattern in patterns]
+
+
+def payloads_to_patterns(payloads: List[Dict], cfg: CFG) -> List[Pattern]:
+    return [payload_to_pattern(payload, cfg) for payload in payloads]
+
+
+def build_artifact(cfg: CFG, patterns: List[Pattern]) -> Dict:
+    """
+    Serialized form of a built CFG and its patterns,
+    so pattern detection and optimization can run in different processes or runs
+    """
+    return {
+        "fingerprint": fingerprint_function(cfg.contract, cfg.function),
+        "cfg": cfg_to_payload(cfg),
+        "patterns": patterns_to_payloads(patterns, cfg),
+    }
+
+
+def load_artifact(
+    artifact: Dict, filename: str, contract: Contract, function: Function
+) -> Tuple[CFG, List[Pattern]]:
+    """
+    Rehydrates an artifact against the compilation unit
+
+    Raises ValueError if the artifact doesn't match the function
+    """
+    # node ids and spans survive an edit that keeps the length of the source,
+    # and the function also depends on callees and modifiers declared in other files
+    if artifact.get("fingerprint") != fingerprint_function(contract, function):
+        raise ValueError(
+            f"Artifact of {contract.name}.{function.full_name} is stale, its sources changed"
+        )
+
+    cfg = payload_to_cfg(artifact["cfg"], filename, contract, function)
+
+    return cfg, payloads_to_patterns(artifact["patterns"], cfg)
+
+
+def write_artifact(path: str, artifact: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf8") as f:
+        json.dump(artifact, f)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path: str) -> Dict:
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
@@ -0,0 +1,80 @@
+from typing import FrozenSet
+
+from slither.core.cfg.node import NodeType
+from slither.core.declarations import Function
+
+from modules.pattern_matcher.patterns import PatternType
+
+# only checked on IF nodes, by evaluate_if
+BRANCH_PATTERNS = frozenset({PatternType.REDUNDANT_CODE, PatternType.OPAQUE_PREDICATE})
+
+# require a loop scope
+LOOP_PATTERNS = frozenset(
+    {PatternType.EXPENSIVE_OPERATION_IN_LOOP, PatternType.LOOP_INVARIANT_OPERATION}
+)
+
+# an IF inside a loop
+LOOP_BRANCH_PATTERNS = frozenset({PatternType.LOOP_INVARIANT_CONDITION})
+
+
+class PatternPrefilter:
+    """
+    PatternPrefilter class
+
+    Decides from the Slither node types alone which patterns a function can match,
+    functions that cannot match any of them skip symbolic execution
+
+    """
+
+    instance = None
+
+    # counters of the current process
+    _skipped: int = 0
+    _analysed: int = 0
+
+    @property
+    def skipped(self) -> int:
+        return self._skipped
+
+    @property
+    def analysed(self) -> int:
+        return self._analysed
+
+    @staticmethod
+    def get_instance():
+        if not PatternPrefilter.instance:
+            PatternPrefilter.instance = PatternPrefilter()
+        return PatternPrefilter.instance
+
+    def get_possible_patterns(self, function: Function) -> FrozenSet[PatternType]:
+        """Returns the patterns that the function can possibly match
+
+        Returns:
+            frozenset(PatternType): empty if symbolic execution can't find anything
+        """
+        node_types = {node.type for node in function.nodes}
+
+        has_branches = NodeType.IF in node_types
+        has_loops = NodeType.STARTLOOP in node_types
+
+        possible_patterns = frozenset()
+        if has_branches:
+            possible_patterns |= BRANCH_PATTERNS
+        if has_loops:
+            possible_patterns |= LOOP_PATTERNS
+        if has_branches and has_loops:
+            possible_patterns |= LOOP_BRANCH_PATTERNS
+
+        return possible_patterns
+
+    def should_analyse(self, function: Function) -> bool:
+        if self.get_possible_patterns(function):
+            self._analysed += 1
+            return True
+
+        self._skipped += 1
+        return False
+
+
+# export the singleton
+patternPrefilter = PatternPrefilter.get_instance()
@@ -10,6 +10,8 @@ class PatternType(Enum):
 
 
 class Pattern:
+    __slots__ = ("_block", "_instruction", "_pattern_type")
+
     def __init__(self, block, instruction, pattern_type):
         self._block = block
         self._instruction = instruction
@@ -31,7 +33,16 @@ class Pattern:
         return f"Block: {self.block.id}\nInstruction: {self.instruction}\n"
 
 
+def format_constraints(path_constraints) -> str:
+    """
+    Z3 terms and their rehydrated textual form are printed the same way
+    """
+    return f"[{', '.join(str(constraint) for constraint in path_constraints)}]"
+
+
 class RedundantCodePattern(Pattern):
+    __slots__ = ("_condition", "_path_constraints")
+
     def __init__(self, block, instruction, condition, path_constraints):
         super().__init__(block, instruction, PatternType.REDUNDANT_CODE)
         self._condition = condition
@@ -49,11 +60,13 @@ class RedundantCodePattern(Pattern):
         output = f"-----PATTERN 1: {self.pattern_type.name}-----\n"
         output += super().__str__()
         output += f"Condition: {self.condition}\n"
-        output += f"Path Constraints: {self.path_constraints}\n"
+        output += f"Path Constraints: {format_constraints(self.path_constraints)}\n"
         return output
 
 
 class OpaquePredicatePattern(Pattern):
+    __slots__ = ("_condition", "_path_constraints")
+
     def __init__(self, block, instruction, condition, path_constraints):
         super().__init__(block, instruction, PatternType.OPAQUE_PREDICATE)
         self._condition = condition
@@ -71,11 +84,13 @@ class OpaquePredicatePattern(Pattern):
         output = f"-----PATTERN 2: {self.pattern_type.name}-----\n"
         output += super().__str__()
         output += f"Condition: {self.condition}\n"
-        output += f"Path Constraints: {self.path_constraints}\n"
+        output += f"Path Constraints: {format_constraints(self.path_constraints)}\n"
         return output
 
 
 class ExpensiveOperationInLoopPattern(Pattern):
+    __slots__ = ("_variables", "_sanitized_variables", "_current_scope")
+
     def __init__(
         self, block, instruction, variable, sanitized_variable_name, current_scope
     ):
@@ -108,6 +123,8 @@ class ExpensiveOperationInLoopPattern(Pattern):
 
 
 class LoopInvariantOperationPattern(Pattern):
+    __slots__ = ("_functions", "_func_calls", "_func_args", "_current_scope")
+
     def __init__(
         self, block, instruction, function, func_call, func_args, current_scope
     ):
@@ -144,6 +161,8 @@ class LoopInvariantOperationPattern(Pattern):
 
 
 class LoopInvariantConditionPattern(Pattern):
+    __slots__ = ("_condition", "_current_scope")
+
     def __init__(self, block, instruction, condition, current_scope):
         super().__init__(block, instruction, PatternType.LOOP_INVARIANT_CONDITION)
         self._condition = condition
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, Tuple
+
+from z3 import BoolVal, CheckSatResult, ExprRef, Solver, unknown
+
+
+class QueryCache:
+    """
+    QueryCache class
+
+    Memoizes satisfiability queries, the asserted path constraints and the checked condition.
+    Z3 hash-conses its terms, structurally equal expressions share the same AST id,
+    so the ids are a canonical key. Shared by every function of the process
+
+    """
+
+    instance = None
+
+    _enabled: bool = True
+
+    # least recently used entries are evicted first
+    _max_entries: int = 100000
+
+    # key -> (result, solving time, terms kept alive so their ids are not reused)
+    _entries: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+
+    # counters of the current process, -fj workers keep their own
+    _hits: int = 0
+    _misses: int = 0
+    _saved_time: float = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def saved_time(self) -> float:
+        """
+        Returns: solving time of the queries answered from the cache, in seconds
+        """
+        return self._saved_time
+
+    @staticmethod
+    def get_instance():
+        if not QueryCache.instance:
+            QueryCache.instance = QueryCache()
+        return QueryCache.instance
+
+    def init_instance(self, max_entries: int = 100000, enabled: bool = True):
+        self._max_entries = max_entries
+        self._enabled = enabled
+
+    def check(
+        self, solver: Solver, condition: ExprRef, path_constraints: Iterable[ExprRef]
+    ) -> CheckSatResult:
+        """Checks the condition under the path constraints asserted in the solver
+
+        Returns:
+            CheckSatResult: sat, unsat or unknown, unknown results are not cached
+        """
+        # literal comparisons and unsupported operators evaluate to plain Python bools
+        condition = to_expr(condition)
+
+        if not self.enabled:
+            return solver.check(condition)
+
+        path_constraints = tuple(to_expr(constraint) for constraint in path_constraints)
+
+        # the path is a conjunction, its order and duplicates don't matter
+        key = (
+            frozenset(constraint.get_id() for constraint in path_constraints),
+            condition.get_id(),
+        )
+
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._saved_time += entry[1]
+            return entry[0]
+
+        self._misses += 1
+
+        start = time.perf_counter()
+        result = solver.check(condition)
+        elapsed = time.perf_counter() - start
+
+        if result != unknown:
+            self._entries[key] = (result, elapsed, (condition, path_constraints))
+
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def clear(self):
+        self._entries = OrderedDict()
+
+
+def to_expr(term) -> ExprRef:
+    return term if isinstance(term, ExprRef) else BoolVal(term)
+
+
+# export the singleton
+queryCache = QueryCache.get_instance()
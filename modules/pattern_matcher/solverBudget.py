@@ -0,0 +1,137 @@
+import time
+
+
+class FunctionBudget:
+    """
+    FunctionBudget class
+
+    Wall-clock and query budget of the symbolic execution of one function
+
+    """
+
+    __slots__ = ("_deadline", "_remaining_queries", "_query_timeout", "_exhausted")
+
+    def __init__(self, function_time: float, function_queries: int, query_timeout: int):
+        # 0 disables the limit
+        self._deadline: float = (
+            time.perf_counter() + function_time if function_time else None
+        )
+        self._remaining_queries: int = function_queries or None
+        self._query_timeout: int = query_timeout
+
+        self._exhausted: bool = False
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Returns: was the budget exceeded, every following query is unknown
+        """
+        return self._exhausted
+
+    def consume_query(self) -> int:
+        """Accounts for a new query
+
+        Returns:
+            int: timeout of the query in ms, 0 for no timeout. None if the budget is exhausted
+        """
+        if self._exhausted:
+            return None
+
+        if self._remaining_queries is not None:
+            if not self._remaining_queries:
+                self._exhausted = True
+                return None
+            self._remaining_queries -= 1
+
+        if self._deadline is None:
+            return self._query_timeout
+
+        remaining_ms = int((self._deadline - time.perf_counter()) * 1000)
+        if remaining_ms <= 0:
+            self._exhausted = True
+            return None
+
+        # a single query can't run past the deadline of the function
+        return min(self._query_timeout, remaining_ms) if self._query_timeout else remaining_ms
+
+
+class SolverBudget:
+    """
+    SolverBudget class
+
+    Limits of the solver, per query and per function. Queries over budget are
+    unknown, both sides of the branch are explored and no P1/P2 is reported
+
+    """
+
+    instance = None
+
+    # ms, 0 disables the limits
+    _query_timeout: int = 2000
+
+    # seconds
+    _function_time: float = 10.0
+
+    _function_queries: int = 5000
+
+    # counters of the current process
+    _unknown_queries: int = 0
+    _exhausted_functions: int = 0
+
+    @property
+    def query_timeout(self) -> int:
+        return self._query_timeout
+
+    @property
+    def function_time(self) -> float:
+        return self._function_time
+
+    @property
+    def function_queries(self) -> int:
+        return self._function_queries
+
+    @property
+    def settings(self) -> str:
+        """
+        Returns: the limits, an analysis under other limits may decide other P1/P2 queries
+        """
+        return f"{self._query_timeout}:{self._function_time}:{self._function_queries}"
+
+    @property
+    def unknown_queries(self) -> int:
+        return self._unknown_queries
+
+    @property
+    def exhausted_functions(self) -> int:
+        return self._exhausted_functions
+
+    @staticmethod
+    def get_instance():
+        if not SolverBudget.instance:
+            SolverBudget.instance = SolverBudget()
+        return SolverBudget.instance
+
+    def init_instance(
+        self,
+        query_timeout: int = 2000,
+        function_time: float = 10.0,
+        function_queries: int = 5000,
+    ):
+        self._query_timeout = query_timeout
+        self._function_time = function_time
+        self._function_queries = function_queries
+
+    def start_function(self) -> FunctionBudget:
+        return FunctionBudget(
+            self._function_time, self._function_queries, self._query_timeout
+        )
+
+    def record_unknown(self):
+        self._unknown_queries += 1
+
+    def record_exhausted(self):
+        self._exhausted_functions += 1
+
+
+# export the singleton
+solverBudget = SolverBudget.get_instance()
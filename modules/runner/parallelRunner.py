@@ -0,0 +1,329 @@
+import os
+import time
+import signal
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, as_completed
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Iterable, List, Dict
+
+# time a task is given past its limit before the parent kills its worker,
+# the in-worker alarm can't interrupt native code such as a Z3 check
+KILL_GRACE_PERIOD = 5
+
+
+class WorkerProcess:
+    """
+    WorkerProcess class
+
+    A worker of the pool and the task it is running, seen from the parent
+
+    """
+
+    __slots__ = ("process", "connection", "future", "args", "deadline")
+
+    def __init__(self, mp_context, initializer: Callable):
+        self.connection, child_connection = mp_context.Pipe()
+
+        self.process = mp_context.Process(
+            target=worker_main, args=(child_connection, initializer), daemon=True
+        )
+        self.process.start()
+
+        # the parent only keeps its end, so a dead worker is seen as EOF
+        child_connection.close()
+
+        # running task
+        self.future: Future = None
+        self.args: tuple = None
+        self.deadline: float = None
+
+    @property
+    def busy(self) -> bool:
+        return self.future is not None
+
+    def start_task(self, future: Future, fn: Callable, args: tuple, timeout: int):
+        self.future = future
+        self.args = args
+        self.deadline = (
+            time.monotonic() + timeout + KILL_GRACE_PERIOD if timeout else None
+        )
+        self.connection.send((fn, args, timeout))
+
+    def finish_task(self) -> Future:
+        future = self.future
+        self.future, self.args, self.deadline = None, None, None
+        return future
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+
+        if self.process.is_alive():
+            self.kill()
+        self.connection.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class ParallelRunner:
+    """
+    ParallelRunner class
+
+    Runs tasks on a pool of long-lived worker processes.
+    Each worker keeps its own Slither/Z3 state across the tasks it receives,
+    and every task result is returned to the parent as a dict.
+    The parent enforces the time limit of each task, a worker stuck past it is killed and replaced
+
+    """
+
+    def __init__(
+        self,
+        jobs: int = None,
+        timeout: int = None,
+        fork: bool = False,
+        initializer: Callable = None,
+    ):
+        # number of worker processes, defaults to the number of CPUs
+        self._jobs: int = jobs or os.cpu_count() or 1
+
+        # wall-clock limit of each task, in seconds
+        self._timeout: int = timeout
+
+        # forked workers share the parent's state at the time they are started,
+        # e.g. an already compiled Slither instance
+        self._mp_context = multiprocessing.get_context("fork" if fork else None)
+
+        # executed once in every worker when it starts, e.g. to warm up imports
+        self._initializer: Callable = initializer
+
+        # tasks waiting for an idle worker, (future, fn, args)
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._closing: bool = False
+
+        # hands the pending tasks to the workers and watches their deadlines,
+        # running while the runner is used as a context manager
+        self._dispatcher: threading.Thread = None
+        self._wakeup_reader: Connection = None
+        self._wakeup_writer: Connection = None
+
+    def __enter__(self):
+        self._closing = False
+        self._wakeup_reader, self._wakeup_writer = multiprocessing.Pipe(duplex=False)
+
+        self._dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        self._dispatcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        # pending tasks are still completed
+        with self._lock:
+            self._closing = True
+            self._wakeup_writer.send(None)
+
+        self._dispatcher.join()
+        self._dispatcher = None
+
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+    @property
+    def jobs(self) -> int:
+        return self._jobs
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout
+
+    def submit(self, fn: Callable, args: tuple) -> Future:
+        """Schedules fn(*args) on the running pool
+
+        Returns:
+            Future: resolves to the dict with the args, result and error of the task
+        """
+        future = Future()
+
+        with self._lock:
+            self._pending.append((future, fn, args))
+            self._wakeup_writer.send(None)
+
+        return future
+
+    def run(self, fn: Callable, tasks: Iterable[tuple]) -> List[Dict]:
+        """Executes fn(*args) for every args in tasks
+
+        Returns:
+            list(dict): args, result and error of each task, in submission order
+        """
+        tasks = list(tasks)
+
+        results = [None] * len(tasks)
+
+        # workers are reused for every task, so imports and caches are only paid once per worker
+        with self:
+            futures = {
+                self.submit(fn, args): index for index, args in enumerate(tasks)
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # the worker itself died, e.g. killed by the OS
+                    results[index] = {
+                        "args": tasks[index],
+                        "result": None,
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+
+        return results
+
+    def dispatch(self):
+        """
+        Dispatcher thread, workers are started lazily up to jobs and replaced when they die or time out
+        """
+        workers: List[WorkerProcess] = []
+
+        try:
+            while True:
+                with self._lock:
+                    self.assign_pending(workers)
+
+                    if self._closing and not self._pending and not any(
+                        worker.busy for worker in workers
+                    ):
+                        return
+
+                busy = [worker for worker in workers if worker.busy]
+                deadlines = [worker.deadline for worker in busy if worker.deadline]
+
+                wait(
+                    [self._wakeup_reader]
+                    + [worker.connection for worker in busy]
+                    + [worker.process.sentinel for worker in busy],
+                    timeout=(
+                        max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                    ),
+                )
+
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+
+                for worker in busy:
+                    self.collect(worker, workers)
+        finally:
+            for worker in workers:
+                if worker.busy:
+                    worker.finish_task().set_exception(
+                        ChildProcessError("runner was shut down")
+                    )
+                worker.stop()
+
+    def assign_pending(self, workers: List[WorkerProcess]):
+        while self._pending:
+            worker = next((worker for worker in workers if not worker.busy), None)
+            if worker is None:
+                if len(workers) >= self.jobs:
+                    return
+
+                worker = WorkerProcess(self._mp_context, self._initializer)
+                workers.append(worker)
+
+            future, fn, args = self._pending.popleft()
+            if future.set_running_or_notify_cancel():
+                worker.start_task(future, fn, args, self.timeout)
+
+    def collect(self, worker: WorkerProcess, workers: List[WorkerProcess]):
+        """
+        Resolves the task of a busy worker if it finished, died or ran out of time
+        """
+        if worker.connection.poll():
+            try:
+                result = worker.connection.recv()
+            except (EOFError, OSError):
+                result = None
+
+            if result is not None:
+                worker.finish_task().set_result(result)
+                return
+
+        if worker.process.is_alive():
+            if worker.deadline is None or time.monotonic() < worker.deadline:
+                return
+
+            # stuck in native code, the in-worker alarm could not interrupt it
+            worker.kill()
+            args = worker.args
+            worker.finish_task().set_result(
+                {
+                    "args": args,
+                    "result": None,
+                    "error": "TimeoutError: task exceeded its time limit",
+                }
+            )
+        else:
+            worker.finish_task().set_exception(
+                ChildProcessError(
+                    f"worker process died with exit code {worker.process.exitcode}"
+                )
+            )
+
+        worker.connection.close()
+        workers.remove(worker)
+
+
+def worker_main(connection: Connection, initializer: Callable = None):
+    """
+    Worker process loop, runs the tasks sent by the parent until it receives None
+    """
+    if initializer:
+        initializer()
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+
+        if task is None:
+            return
+
+        fn, args, timeout = task
+        result = run_task(fn, args, timeout)
+
+        try:
+            connection.send(result)
+        except Exception as e:
+            # e.g. a result that can't be pickled
+            connection.send(
+                {"args": args, "result": None, "error": f"{type(e).__name__}: {e}"}
+            )
+
+
+def run_task(fn: Callable, args: tuple, timeout: int = None) -> Dict:
+    """
+    Worker side of a task, never raises so that a single task can't take down the pool
+    """
+    if timeout:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.alarm(timeout)
+
+    try:
+        return {"args": args, "result": fn(*args), "error": None}
+    except Exception as e:
+        return {"args": args, "result": None, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        if timeout:
+            signal.alarm(0)
+
+
+def raise_timeout(signum, frame):
+    raise TimeoutError("task exceeded its time limit")
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import socketserver
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Dict
+
+from modules.runner.parallelRunner import ParallelRunner
+
+
+class SiphonServer:
+    """
+    SiphonServer class
+
+    Long-running analysis daemon. Requests are JSON objects, one per line:
+
+        {"id": 1, "file": "a.sol", "contract": "A", "function": "f"}
+
+    and every request gets a single JSON line back with the found patterns and optimized source.
+    Requests are served concurrently by a pool of warm worker processes,
+    requests on the same file one after the other since they share its output dir
+
+    """
+
+    def __init__(
+        self,
+        run_file: Callable,
+        jobs: int = None,
+        timeout: int = None,
+        setup: Callable = None,
+    ):
+        # pipeline entrypoint executed by the workers for each request
+        self._run_file: Callable = run_file
+
+        self._runner: ParallelRunner = ParallelRunner(
+            jobs, timeout, initializer=partial(init_worker, setup)
+        )
+
+        # last request scheduled on each file, the next one waits for it
+        self._last_by_file: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def runner(self) -> ParallelRunner:
+        return self._runner
+
+    def submit(self, line: str):
+        """Schedules a raw request line on the worker pool
+
+        Returns:
+            Future: resolves to the dict with the args, result and error of the request
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return None, {"id": None, "result": None, "error": f"Invalid request: {e}"}
+
+        if not isinstance(request, dict) or not request.get("file"):
+            return None, {
+                "id": request.get("id") if isinstance(request, dict) else None,
+                "result": None,
+                "error": "Invalid request: expected an object with a 'file'",
+            }
+
+        return request, self.submit_request(request)
+
+    def submit_request(self, request: Dict) -> Future:
+        """Schedules a request once the previous request on the same file is done
+
+        Returns:
+            Future: resolves to the dict with the args, result and error of the request
+        """
+        file = os.path.abspath(request["file"])
+        future = Future()
+
+        with self._lock:
+            previous = self._last_by_file.get(file)
+            self._last_by_file[file] = future
+
+        def resolve(task: Future):
+            with self._lock:
+                if self._last_by_file.get(file) is future:
+                    del self._last_by_file[file]
+
+            try:
+                future.set_result(task.result())
+            except BaseException as e:
+                future.set_exception(e)
+
+        def start(_=None):
+            self.runner.submit(handle_request, (self._run_file, request)).add_done_callback(
+                resolve
+            )
+
+        if previous is None:
+            start()
+        else:
+            previous.add_done_callback(start)
+
+        return future
+
+    def serve_stdio(self):
+        """
+        Read requests from stdin and write responses to stdout as soon as they complete
+        """
+        # responses of concurrent requests must not interleave
+        lock = threading.Lock()
+
+        def write_response(response: Dict):
+            with lock:
+                sys.stdout.write(json.dumps(response) + "\n")
+                sys.stdout.flush()
+
+        with self.runner:
+            futures = []
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+
+                request, future = self.submit(line)
+                if request is None:
+                    write_response(future)
+                    continue
+
+                future.add_done_callback(
+                    lambda future, request=request: write_response(
+                        build_response(request, future)
+                    )
+                )
+                futures.append(future)
+
+            # wait for pending requests before shutting down
+            for future in futures:
+                future.exception()
+
+    def serve_socket(self, socket_path: str):
+        """
+        Accept connections on a Unix domain socket, each connection is handled in its own thread
+        """
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+
+                    request, future = server.submit(line.decode())
+                    response = (
+                        future
+                        if request is None
+                        else build_response(request, future)
+                    )
+
+                    self.wfile.write((json.dumps(response) + "\n").encode())
+                    self.wfile.flush()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        with self.runner, socketserver.ThreadingUnixStreamServer(
+            socket_path, RequestHandler
+        ) as unix_server:
+            print(f"[*] - Listening on {socket_path}\n", file=sys.stderr)
+            try:
+                unix_server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.remove(socket_path)
+
+
+def init_worker(setup: Callable = None):
+    """
+    Runs once per worker: stdout may be the protocol channel, so the pipeline logs go to stderr,
+    the pipeline is configured and the heavy modules are loaded before the first request arrives
+    """
+    sys.stdout = sys.stderr
+
+    if setup:
+        setup()
+
+    import modules.symbolic_execution_engine.seEngine
+    import modules.code_optimizer.optimizer
+    import modules.code_optimizer.codeGenerator
+
+
+def handle_request(run_file: Callable, request: Dict) -> list:
+    """
+    Worker side of a request, returns the patterns and optimized source of every analysed function
+    """
+    results = run_file(request["file"], request.get("contract"), request.get("function"))
+
+    for result in results:
+        result["patterns_report"] = read_output(result["output_dir"], "patterns.txt")
+
+        # avoid returning a stale file from a previous run
+        result["optimized_source"] = (
+            read_output(result["output_dir"], f"{result['function']}-optimized.sol")
+            if result["optimized"]
+            else None
+        )
+
+    return results
+
+
+def build_response(request: Dict, future) -> Dict:
+    try:
+        task = future.result()
+    except BaseException as e:
+        # the worker itself died, the client still gets an answer
+        return {
+            "id": request.get("id"),
+            "result": None,
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+    return {"id": request.get("id"), "result": task["result"], "error": task["error"]}
+
+
+def read_output(dir_path: str, filename: str) -> str:
+    try:
+        with open(os.path.join(dir_path, filename), "r", encoding="utf8") as f:
+            return f.read()
+    except OSError:
+        return None
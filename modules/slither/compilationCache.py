@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import fcntl
+import hashlib
+import zipfile
+import subprocess
+from typing import Dict, List
+
+from crytic_compile import CryticCompile
+from crytic_compile.utils.zip import save_to_zip, load_from_zip
+
+
+class CompilationCache:
+    """
+    CompilationCache class
+
+    Content-addressed on-disk store of crytic-compile artifacts.
+    Entries are keyed on the target's source hash, the solc version and the compile settings,
+    so a re-run on an unchanged file skips solc entirely
+
+    """
+
+    instance = None
+
+    _cache_dir: str = ".siphon_cache"
+
+    # LRU size cap of the cache directory, in bytes
+    _max_size: int = 512 * 1024 * 1024
+
+    _enabled: bool = True
+
+    # hit/miss counters of the current process
+    _hits: int = 0
+    _misses: int = 0
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @staticmethod
+    def get_instance():
+        if not CompilationCache.instance:
+            CompilationCache.instance = CompilationCache()
+        return CompilationCache.instance
+
+    def init_instance(
+        self, cache_dir: str = None, max_size: int = None, enabled: bool = True
+    ):
+        if cache_dir:
+            self._cache_dir = cache_dir
+
+        if max_size is not None:
+            self._max_size = max_size
+
+        self._enabled = enabled
+
+    def compile(self, target: str, **settings) -> CryticCompile:
+        """Returns the crytic-compile artifacts of the target,
+        only invoking solc if no valid cache entry exists
+
+        Returns:
+            CryticCompile: compilation of the target
+        """
+        if not self.enabled:
+            return CryticCompile(target, **settings)
+
+        key = self.compute_key(target, settings)
+
+        if (crytic_compile := self.load(key)) is not None:
+            self._hits += 1
+            self.update_stats(hits=1)
+            return crytic_compile
+
+        self._misses += 1
+        self.update_stats(misses=1)
+
+        crytic_compile = CryticCompile(target, **settings)
+        self.store(key, crytic_compile)
+
+        return crytic_compile
+
+    def compute_key(self, target: str, settings: Dict) -> str:
+        """
+        sha256(source, solc version, compile settings)
+        """
+        key = hashlib.sha256()
+
+        with open(target, "rb") as f:
+            key.update(f.read())
+
+        # an explicitly selected solc is already part of the settings
+        if "solc" not in settings:
+            key.update(self.get_solc_version().encode())
+        key.update(json.dumps(settings, sort_keys=True, default=str).encode())
+
+        return key.hexdigest()
+
+    def load(self, key: str) -> CryticCompile:
+        archive_path, manifest_path = self.get_entry_paths(key)
+
+        if not os.path.exists(archive_path) or not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf8") as f:
+                manifest = json.load(f)
+
+            # imported files are part of the compilation but not of the key
+            # an entry is only valid if none of them changed since it was stored
+            if not all(
+                self.hash_file(filename) == file_hash
+                for filename, file_hash in manifest.get("sources", {}).items()
+            ):
+                return None
+
+            crytic_compile = load_from_zip(archive_path)[0]
+        except zipfile.BadZipFile:
+            # truncated or corrupted archive, a miss that is stored again
+            self.remove_entry(key)
+            return None
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+        # mark the entry as recently used
+        os.utime(archive_path)
+        os.utime(manifest_path)
+
+        return crytic_compile
+
+    def store(self, key: str, crytic_compile: CryticCompile):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        archive_path, manifest_path = self.get_entry_paths(key)
+
+        manifest = {
+            "sources": {
+                filename.absolute: self.hash_file(filename.absolute)
+                for filename in crytic_compile.filenames
+            }
+        }
+
+        # write to temporary files first, concurrent runs can share the same cache
+        tmp_suffix = f".{os.getpid()}.tmp"
+        save_to_zip([crytic_compile], archive_path + tmp_suffix)
+        with open(manifest_path + tmp_suffix, "w", encoding="utf8") as f:
+            json.dump(manifest, f)
+
+        os.replace(archive_path + tmp_suffix, archive_path)
+        os.replace(manifest_path + tmp_suffix, manifest_path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_size
+        """
+        entries = self.get_entries()
+        total_size = sum(size for _, _, size in entries)
+
+        # oldest first
+        for key, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total_size <= self.max_size:
+                break
+
+            self.remove_entry(key)
+            total_size -= size
+
+    def remove_entry(self, key: str):
+        for path in self.get_entry_paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_entries(self) -> List[tuple]:
+        """Returns the cache entries
+
+        Returns:
+            list(key, last_used, size): List of entries
+        """
+        entries = []
+
+        if not os.path.exists(self.cache_dir):
+            return entries
+
+        for file in os.listdir(self.cache_dir):
+            if not file.endswith(".zip"):
+                continue
+
+            key = file[: -len(".zip")]
+            try:
+                size = sum(os.path.getsize(path) for path in self.get_entry_paths(key))
+                last_used = os.path.getmtime(os.path.join(self.cache_dir, file))
+            except OSError:
+                continue
+
+            entries.append((key, last_used, size))
+
+        return entries
+
+    def get_entry_paths(self, key: str):
+        return (
+            os.path.join(self.cache_dir, f"{key}.zip"),
+            os.path.join(self.cache_dir, f"{key}.json"),
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters accumulated across runs
+
+        Returns:
+            dict(counter, value): Dict of counters
+        """
+        stats_path = os.path.join(self.cache_dir, "stats.json")
+
+        try:
+            with open(stats_path, "r", encoding="utf8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def update_stats(self, hits: int = 0, misses: int = 0):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        stats_path = os.path.join(self.cache_dir, "stats.json")
+
+        # workers and concurrent runs share the counters, the read-modify-write is serialized
+        with open(os.path.join(self.cache_dir, "stats.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            stats = self.get_stats()
+            stats["hits"] = stats.get("hits", 0) + hits
+            stats["misses"] = stats.get("misses", 0) + misses
+
+            tmp_path = f"{stats_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf8") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, stats_path)
+
+    def get_solc_version(self) -> str:
+        """
+        Resolved on every compile, solc-select can switch the default compiler
+        during a batch run or the lifetime of the daemon
+        """
+        try:
+            output = subprocess.run(
+                ["solc", "--version"], capture_output=True, text=True, timeout=30
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            output = ""
+
+        match = re.search(r"Version:\s*(\S+)", output)
+        return match[1] if match else "unknown"
+
+    def hash_file(self, filename: str) -> str:
+        try:
+            with open(filename, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+
+# export the singleton
+compilationCache = CompilationCache.get_instance()
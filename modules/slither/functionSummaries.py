@@ -0,0 +1,174 @@
+from typing import Dict, FrozenSet, List, Tuple
+
+from slither.core.declarations import Contract, Function
+
+
+class FunctionSummary:
+    """
+    FunctionSummary class
+
+    Properties of a function that the pattern matcher and the optimizer query
+    repeatedly, read from Slither once
+
+    """
+
+    __slots__ = (
+        "_function",
+        "_is_pure",
+        "_is_view",
+        "_storage_reads",
+        "_storage_writes",
+        "_has_internal_calls",
+        "_has_external_calls",
+    )
+
+    def __init__(self, function: Function):
+        self._function: Function = function
+
+        self._is_pure: bool = bool(function.pure)
+        self._is_view: bool = bool(function.view)
+
+        # transitive, includes the accesses of the internal calls
+        self._storage_reads: FrozenSet[str] = frozenset(
+            variable.name for variable in function.all_state_variables_read()
+        )
+        self._storage_writes: FrozenSet[str] = frozenset(
+            variable.name for variable in function.all_state_variables_written()
+        )
+
+        self._has_internal_calls: bool = bool(
+            function.internal_calls or function.solidity_calls
+        )
+        self._has_external_calls: bool = bool(
+            function.low_level_calls
+            or function.high_level_calls
+            or function.library_calls
+            or function.external_calls_as_expressions
+        )
+
+    @property
+    def function(self) -> Function:
+        return self._function
+
+    @property
+    def name(self) -> str:
+        return self._function.name
+
+    @property
+    def signature(self) -> str:
+        """
+        Returns: full name of the function, name(arg types)
+        """
+        return self._function.full_name
+
+    @property
+    def is_pure(self) -> bool:
+        return self._is_pure
+
+    @property
+    def is_view(self) -> bool:
+        return self._is_view
+
+    @property
+    def storage_reads(self) -> FrozenSet[str]:
+        """
+        Returns: names of the state variables read, including through internal calls
+        """
+        return self._storage_reads
+
+    @property
+    def storage_writes(self) -> FrozenSet[str]:
+        """
+        Returns: names of the state variables written, including through internal calls
+        """
+        return self._storage_writes
+
+    @property
+    def has_internal_calls(self) -> bool:
+        return self._has_internal_calls
+
+    @property
+    def has_external_calls(self) -> bool:
+        return self._has_external_calls
+
+    @property
+    def makes_calls(self) -> bool:
+        """
+        Returns: does the function call anything, internal or external
+        """
+        return self._has_internal_calls or self._has_external_calls
+
+    @property
+    def return_type(self) -> List:
+        """
+        Returns: return types of the function, empty if it returns nothing
+        """
+        return self._function.return_type or []
+
+
+class ContractSummaries:
+    """
+    ContractSummaries class
+
+    Summaries of every function of a contract, by name and by signature
+
+    """
+
+    __slots__ = ("_by_name", "_by_signature")
+
+    def __init__(self, contract: Contract):
+        self._by_name: Dict[str, FunctionSummary] = {}
+        self._by_signature: Dict[str, FunctionSummary] = {}
+
+        for function in contract.functions:
+            summary = FunctionSummary(function)
+
+            # overloads share the name, the first declared one is kept
+            self._by_name.setdefault(summary.name, summary)
+            self._by_signature[summary.signature] = summary
+
+    def get_by_name(self, name: str) -> FunctionSummary:
+        return self._by_name.get(name)
+
+    def get_by_signature(self, signature: str) -> FunctionSummary:
+        return self._by_signature.get(signature)
+
+    def get_summary(self, function: Function) -> FunctionSummary:
+        return self._by_signature.get(function.full_name)
+
+
+class FunctionSummaryCache:
+    """
+    FunctionSummaryCache class
+
+    One ContractSummaries per contract of the file being analysed,
+    shared by all of its functions
+
+    """
+
+    instance = None
+
+    _contracts: Dict[Tuple[str, int], ContractSummaries] = {}
+
+    @staticmethod
+    def get_instance():
+        if not FunctionSummaryCache.instance:
+            FunctionSummaryCache.instance = FunctionSummaryCache()
+        return FunctionSummaryCache.instance
+
+    def get_summaries(self, contract: Contract) -> ContractSummaries:
+        key = (contract.name, contract.id)
+
+        if (summaries := self._contracts.get(key)) is None:
+            summaries = self._contracts[key] = ContractSummaries(contract)
+        return summaries
+
+    def release(self):
+        """
+        Drop the summaries once the file is analysed, ids are only unique per compilation
+        """
+        self._contracts = {}
+
+
+# export the singleton
+functionSummaryCache = FunctionSummaryCache.get_instance()
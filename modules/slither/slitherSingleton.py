@@ -1,9 +1,12 @@
-from functools import reduce
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Mapping, Tuple
 
 from slither.slither import Slither
 from slither.core.declarations import Function, Contract
 
+from modules.slither.compilationCache import compilationCache
+from modules.slither.solcSelector import get_compile_settings
+
 
 class SlitherSingleton:
     """
@@ -16,6 +19,16 @@ class SlitherSingleton:
     def __init__(self) -> None:
         self.slither = None
 
+        # name indexes, built once per compilation
+        self._contracts: Tuple["Contract", ...] = ()
+        self._contracts_by_name: Mapping[str, "Contract"] = MappingProxyType({})
+        self._functions_by_name: Mapping[Tuple[str, str], "Function"] = (
+            MappingProxyType({})
+        )
+        self._functions_by_contract: Mapping[str, Tuple["Function", ...]] = (
+            MappingProxyType({})
+        )
+
     @staticmethod
     def get_slither_instance():
         if not SlitherSingleton.instance:
@@ -27,20 +40,60 @@ class SlitherSingleton:
             return
 
         if not self.slither or override:
-            self.slither = Slither(target)
+            # solc is only invoked if the compilation is not cached,
+            # with the newest installed version satisfying the pragma
+            self.slither = Slither(
+                compilationCache.compile(target, **get_compile_settings(target))
+            )
+
+            # a new compilation invalidates the previous indexes
+            self.build_indexes()
+
+    def build_indexes(self):
+        """
+        Precompute the name lookups over the current compilation
+        """
+        contracts = tuple(
+            contract
+            for contract in self.slither.contracts
+            if not contract.is_library and not contract.is_interface
+        )
+
+        contracts_by_name = {}
+        functions_by_name = {}
+        functions_by_contract = {}
+
+        for contract in contracts:
+            # assume unique contract name
+            contracts_by_name.setdefault(contract.name, contract)
+
+            functions = tuple(
+                dict.fromkeys(
+                    fn
+                    for fn in contract.functions
+                    if not fn.name.startswith(
+                        "slither"
+                    )  # ignore functions injected by slither
+                )
+            )
+            functions_by_contract[contract.name] = functions
 
-    def get_contracts(self) -> List["Contract"]:
+            for function in functions:
+                # only one function with the given name
+                functions_by_name.setdefault((contract.name, function.name), function)
+
+        self._contracts = contracts
+        self._contracts_by_name = MappingProxyType(contracts_by_name)
+        self._functions_by_name = MappingProxyType(functions_by_name)
+        self._functions_by_contract = MappingProxyType(functions_by_contract)
+
+    def get_contracts(self) -> Tuple["Contract", ...]:
         """Returns the contracts in the target file
 
         Returns:
-            list(contracts): List of Contracts
+            tuple(contracts): Contracts
         """
-        return list(
-            filter(
-                lambda contract: not contract.is_library and not contract.is_interface,
-                self.slither.contracts,
-            )
-        )
+        return self._contracts
 
     def get_contract_by_name(self, contract_name: str) -> Contract:
         """Returns contract with given name
@@ -48,59 +101,30 @@ class SlitherSingleton:
         Returns:
             contract: Contract
         """
-        contracts = list(
-            filter(
-                lambda contract: contract.name == contract_name, self.get_contracts()
-            )
-        )
+        if contract := self._contracts_by_name.get(contract_name):
+            return contract
 
-        if contracts:
-            return contracts[0]  # assume unique contract name
-
-        print("[*] - Contract not found...\n")
-        exit()
+        # an exception, so batch runs and the daemon can carry on with the next target
+        raise ValueError(f"Contract not found: {contract_name}")
 
     def get_function_by_name(self, contract_name: str, function_name: str):
-        functions = list(
-            filter(
-                lambda function: function.name == function_name,
-                self.get_all_functions_in_contract(contract_name),
-            )
-        )
+        if function := self._functions_by_name.get((contract_name, function_name)):
+            return function
 
-        if functions:
-            return functions[0]  # only one function with the given name
+        raise ValueError(f"Function not found: {contract_name}.{function_name}")
 
-        print("[*] - Function not found...\n")
-        exit()
+    def get_all_functions_in_contract(
+        self, contract_name: str
+    ) -> Tuple["Function", ...]:
+        return self._functions_by_contract.get(contract_name, ())
 
-    def get_all_functions_in_contract(self, contract_name: str) -> List["Function"]:
-        return self.get_functions_by_contract().get(contract_name, [])
-
-    def get_functions_by_contract(self) -> Dict[str, List["Function"]]:
+    def get_functions_by_contract(self) -> Mapping[str, Tuple["Function", ...]]:
         """Returns a mapping of each contract to its functions
 
         Returns:
-            dict(contract.name, functions): Dict of functions by contract
+            dict(contract.name, functions): Read-only mapping of functions by contract
         """
-        return reduce(
-            lambda result, contract: result.update(
-                {
-                    contract.name: list(
-                        {
-                            fn
-                            for fn in contract.functions
-                            if not fn.name.startswith(
-                                "slither"
-                            )  # ignore functions injected by slither
-                        }
-                    )
-                }
-            )
-            or result,
-            self.get_contracts(),
-            {},
-        )
+        return self._functions_by_contract
 
 
 # export the singleton
@@ -0,0 +1,176 @@
+import os
+import re
+import glob
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+Version = Tuple[int, int, int]
+
+# where solc-select and py-solc-x keep the downloaded binaries
+SOLC_SELECT_DIRS = [
+    os.path.join(os.environ.get("VIRTUAL_ENV", ""), ".solc-select", "artifacts"),
+    os.path.join(os.path.expanduser("~"), ".solc-select", "artifacts"),
+]
+SOLCX_DIR = os.path.join(os.path.expanduser("~"), ".solcx")
+
+
+@lru_cache(maxsize=None)
+def get_installed_compilers() -> Dict[Version, str]:
+    """Returns the solc binaries already installed locally, no network access
+
+    Returns:
+        dict(version, path): Dict of solc binaries by version
+    """
+    compilers = {}
+
+    candidates = []
+    for solc_select_dir in SOLC_SELECT_DIRS:
+        # artifacts/solc-0.8.19/solc-0.8.19 or artifacts/solc-0.8.19
+        candidates += glob.glob(os.path.join(solc_select_dir, "solc-*", "solc-*"))
+        candidates += glob.glob(os.path.join(solc_select_dir, "solc-*"))
+
+    # .solcx/solc-v0.8.19
+    candidates += glob.glob(os.path.join(SOLCX_DIR, "solc-v*"))
+
+    for path in candidates:
+        match = re.fullmatch(r"solc-v?(\d+)\.(\d+)\.(\d+)", os.path.basename(path))
+        if match and os.path.isfile(path) and os.access(path, os.X_OK):
+            compilers.setdefault(tuple(map(int, match.groups())), path)
+
+    return compilers
+
+
+def parse_pragmas(source_code: str) -> List[List[List[Tuple[str, Version]]]]:
+    """Parses every `pragma solidity` of a file
+
+    Returns:
+        list(constraint): one constraint per pragma, each a list of alternatives (||)
+        made of (operator, version) comparisons that must all hold
+    """
+    # flattened files often contain commented out pragmas
+    source_code = re.sub(r"//[^\n]*|/\*.*?\*/", "", source_code, flags=re.DOTALL)
+
+    return [
+        parse_constraint(expression)
+        for expression in re.findall(r"pragma\s+solidity\s+([^;]+);", source_code)
+    ]
+
+
+def parse_constraint(expression: str) -> List[List[Tuple[str, Version]]]:
+    alternatives = []
+
+    for alternative in expression.split("||"):
+        # hyphen ranges: 0.4.0 - 0.5.0
+        if hyphen := re.fullmatch(r"\s*([\d.x*]+)\s+-\s+([\d.x*]+)\s*", alternative):
+            alternatives.append(
+                [
+                    (">=", parse_version(hyphen[1])[0]),
+                    ("<=", parse_version(hyphen[2])[0]),
+                ]
+            )
+            continue
+
+        comparisons = []
+        for operator, version in re.findall(
+            r"(\^|~|>=|<=|>|<|=)?\s*(\d+(?:\.(?:\d+|x|\*))*)", alternative
+        ):
+            comparisons += expand_comparison(operator, version)
+
+        alternatives.append(comparisons)
+
+    return alternatives
+
+
+def expand_comparison(operator: str, version: str) -> List[Tuple[str, Version]]:
+    """
+    Converts caret, tilde, exact and partial versions into plain >= / < comparisons
+    """
+    lower, precision = parse_version(version)
+    major, minor, patch = lower
+
+    if operator == "^":
+        if major > 0:
+            upper = (major + 1, 0, 0)
+        elif minor > 0 or precision < 3:
+            upper = (0, minor + 1, 0)
+        else:
+            upper = (0, 0, patch + 1)
+        return [(">=", lower), ("<", upper)]
+
+    if operator == "~":
+        upper = (major + 1, 0, 0) if precision == 1 else (major, minor + 1, 0)
+        return [(">=", lower), ("<", upper)]
+
+    if operator in ["", "="]:
+        # 0.8 and 0.8.x match every patch
+        if precision == 1:
+            return [(">=", lower), ("<", (major + 1, 0, 0))]
+        if precision == 2:
+            return [(">=", lower), ("<", (major, minor + 1, 0))]
+        return [("=", lower)]
+
+    return [(operator, lower)]
+
+
+def parse_version(version: str) -> Tuple[Version, int]:
+    """Parses a possibly partial version
+
+    Returns:
+        (version, precision): version padded with zeros, number of specified parts
+    """
+    parts = []
+    for part in version.split("."):
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+
+    precision = len(parts)
+    parts += [0] * (3 - len(parts))
+
+    return tuple(parts[:3]), precision
+
+
+def satisfies(version: Version, constraint: List[List[Tuple[str, Version]]]) -> bool:
+    operators = {
+        "=": lambda x, y: x == y,
+        ">": lambda x, y: x > y,
+        ">=": lambda x, y: x >= y,
+        "<": lambda x, y: x < y,
+        "<=": lambda x, y: x <= y,
+    }
+
+    return any(
+        all(operators[operator](version, bound) for operator, bound in alternative)
+        for alternative in constraint
+    )
+
+
+def select_solc(filename: str) -> Tuple[Version, str]:
+    """Picks the newest installed solc that satisfies every pragma of the file
+
+    Returns:
+        (version, path): selected solc, or (None, None) if none is installed or satisfies it
+    """
+    with open(filename, "r", encoding="utf8", errors="replace") as f:
+        constraints = parse_pragmas(f.read())
+
+    for version, path in sorted(get_installed_compilers().items(), reverse=True):
+        if all(satisfies(version, constraint) for constraint in constraints):
+            return version, path
+
+    return None, None
+
+
+def get_compile_settings(filename: str) -> Dict[str, str]:
+    """Returns the crytic-compile settings selecting the right solc for the file
+
+    Returns:
+        dict(setting, value): empty if the default solc should be used
+    """
+    _, path = select_solc(filename)
+
+    return {"solc": path} if path else {}
+
+
+def format_version(version: Version) -> str:
+    return ".".join(map(str, version))
@@ -0,0 +1,74 @@
+from typing import Any, Iterator
+
+
+class LinkedStack:
+    """
+    LinkedStack class
+
+    Immutable stack, push and pop return a new stack sharing the rest of the items.
+    Forking the state of a path is free, branches can never modify each other's stack
+
+    """
+
+    __slots__ = ("_top", "_rest", "_size")
+
+    def __init__(self, top: Any = None, rest: "LinkedStack" = None):
+        self._top: Any = top
+        self._rest: "LinkedStack" = rest
+        self._size: int = rest._size + 1 if rest is not None else 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterates from the bottom to the top, like a list
+        """
+        return reversed(self.to_list())
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("LinkedStack index out of range")
+
+        # walk down from the top, [-1] is O(1)
+        node = self
+        for _ in range(self._size - 1 - index):
+            node = node._rest
+        return node._top
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    @property
+    def top(self) -> Any:
+        """
+        Returns: the last pushed item, None if empty
+        """
+        return self._top
+
+    def push(self, item: Any) -> "LinkedStack":
+        return LinkedStack(item, self)
+
+    def pop(self) -> "LinkedStack":
+        """Returns the stack without its top item
+
+        Returns:
+            LinkedStack: the rest of the stack, an empty stack stays empty
+        """
+        return self._rest if self._rest is not None else self
+
+    def to_list(self) -> list:
+        """
+        Returns: the items from the top to the bottom
+        """
+        items = []
+        node = self
+        while node._rest is not None:
+            items.append(node._top)
+            node = node._rest
+        return items
@@ -1,7 +1,6 @@
 from typing import List
 from z3 import *
 import re
-from copy import deepcopy
 
 from slither.core.cfg.node import NodeType, Node
 from slither.core.expressions.expression import Expression
@@ -12,6 +11,7 @@ from slither.core.solidity_types.mapping_type import MappingType
 from modules.cfg_builder.cfg import CFG
 from modules.cfg_builder.block import Block
 from modules.symbolic_execution_engine.symbolicTable import SymbolicTable, SymbolType
+from modules.symbolic_execution_engine.linkedStack import LinkedStack
 from modules.pattern_matcher.patternMatcher import PatternMatcher
 
 
@@ -43,6 +43,15 @@ class SymbolicExecutionEngine:
         """
         return self._pattern_matcher
 
+    @property
+    def solver(self) -> Solver:
+        """Returns the incremental solver of the function
+
+        Returns:
+            Solver: holds the constraints of the path being explored
+        """
+        return self._pattern_matcher.solver
+
     def init_symbolic_table(self, symbolic_table: SymbolicTable):
         """Initialise the variables common to all paths"""
         for arg in self.cfg.retrieve_function_args():
@@ -68,10 +77,10 @@ class SymbolicExecutionEngine:
         self.init_symbolic_table(symbolic_table)
 
         # Store the path_contraints for each branch
-        path_constraints: List = []
+        path_constraints: LinkedStack = LinkedStack()
 
         # Store the identifiers of the loops
-        loop_scope: List = []
+        loop_scope: LinkedStack = LinkedStack()
 
         # start executing from the initial block
         self.execute_block(self.cfg.head, symbolic_table, path_constraints, loop_scope)
@@ -86,39 +95,37 @@ class SymbolicExecutionEngine:
         return self.pattern_matcher._patterns
 
     def export_patterns(self):
-        dir_path = os.path.join(
-            "output",
-            self._filename.replace(".sol", ""),
-            self.cfg.contract.name,
-            self.cfg.function.name,
-        )
-
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
-
-        # Create the file path
-        file_path = os.path.join(dir_path, "patterns")
-
-        with open(f"{file_path}.txt", "w", encoding="utf8") as f:
-            if not self.pattern_matcher._patterns:
-                f.write("** No Patterns found **")
-            else:
-                f.write(str(self.pattern_matcher))
+        export_patterns(self._filename, self.cfg, self.pattern_matcher)
 
     def execute_block(
         self,
         block: Block,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
     ):
-        if len(block.instructions) == 0:
+        if not block.instruction_count:
             return
 
         for instruction in block.instructions:
-            traverse_additional_paths = self.evaluate_instruction(
-                block, instruction, symbolic_table, path_contraints, loop_scope
-            )
+            match instruction.type:
+                # entering or leaving a loop changes the scope of what follows
+                case NodeType.STARTLOOP:
+                    loop_scope = self.evaluate_begin_loop(
+                        block, instruction, symbolic_table, path_contraints, loop_scope
+                    )
+                    traverse_additional_paths = None
+
+                case NodeType.ENDLOOP:
+                    loop_scope = self.evaluate_end_loop(
+                        block, instruction, symbolic_table, path_contraints, loop_scope
+                    )
+                    traverse_additional_paths = None
+
+                case _:
+                    traverse_additional_paths = self.evaluate_instruction(
+                        block, instruction, symbolic_table, path_contraints, loop_scope
+                    )
 
         # this will only happen, at most, once at the end of each block
         # saveguard against executing unreachable blocks
@@ -142,8 +149,8 @@ class SymbolicExecutionEngine:
         traverse_additional_paths: dict,
         block: Block,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
     ):
         """
         Avoid executing unreachable paths
@@ -164,45 +171,66 @@ class SymbolicExecutionEngine:
         # store reachability information
         block._reachability.append(should_traverse_true_path)
 
+        # forks are copy-on-write, the stacks are immutable and shared
         if should_traverse_true_path:
-            new_symbolic_table = deepcopy(symbolic_table)
-            new_loop_scope = deepcopy(loop_scope)
+            new_symbolic_table = symbolic_table.fork()
 
-            new_path_constraints = deepcopy(path_contraints)
-            new_path_constraints.append(true_path_constraint)
-            self.execute_block(
+            new_path_constraints = path_contraints.push(true_path_constraint)
+            self.execute_branch(
                 block.true_path,
+                true_path_constraint,
                 new_symbolic_table,
                 new_path_constraints,
-                new_loop_scope,
+                loop_scope,
             )
 
         if should_traverse_false_path and block.false_path:
-            new_symbolic_table = deepcopy(symbolic_table)
-            new_loop_scope = deepcopy(loop_scope)
+            new_symbolic_table = symbolic_table.fork()
 
             # else case is optional
-            new_path_constraints = deepcopy(path_contraints)
-            new_path_constraints.append(false_path_constraint)
+            new_path_constraints = path_contraints.push(false_path_constraint)
 
             # exiting from loop, pop current scope
-            if block.instructions[-1].type == NodeType.IFLOOP:
-                new_loop_scope.pop()
+            new_loop_scope = loop_scope
+            if block.last_instruction.type == NodeType.IFLOOP:
+                new_loop_scope = loop_scope.pop()
 
-            self.execute_block(
+            self.execute_branch(
                 block.false_path,
+                false_path_constraint,
                 new_symbolic_table,
                 new_path_constraints,
                 new_loop_scope,
             )
 
+    def execute_branch(
+        self,
+        block: Block,
+        branch_constraint,
+        symbolic_table: SymbolicTable,
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
+    ):
+        """
+        Executes a branch in its own solver scope, only its constraint is asserted
+        and learned lemmas are kept for the sibling paths
+        """
+        self.solver.push()
+
+        # an exception in the branch must not leave its constraint asserted for the callers
+        try:
+            self.solver.add(branch_constraint)
+            self.execute_block(block, symbolic_table, path_contraints, loop_scope)
+        finally:
+            self.solver.pop()
+
     def evaluate_instruction(
         self,
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        path_constraints: list,
-        loop_scope: list,
+        path_constraints: LinkedStack,
+        loop_scope: LinkedStack,
     ):
         match instruction.type:
             case NodeType.IF:
@@ -220,21 +248,11 @@ class SymbolicExecutionEngine:
                     block, instruction, symbolic_table, loop_scope, path_constraints
                 )
 
-            case NodeType.STARTLOOP:
-                self.evaluate_begin_loop(
-                    block, instruction, symbolic_table, path_constraints, loop_scope
-                )
-
             case NodeType.IFLOOP:
                 return self.evaluate_if_loop(
                     block, instruction, symbolic_table, path_constraints, loop_scope
                 )
 
-            case NodeType.ENDLOOP:
-                return self.evaluate_end_loop(
-                    block, instruction, symbolic_table, path_constraints, loop_scope
-                )
-
             case _:
                 self.evaluate_default(instruction, symbolic_table, path_constraints)
 
@@ -243,8 +261,8 @@ class SymbolicExecutionEngine:
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
     ):
         if_operation = self.build_if_operation(
             block, instruction, symbolic_table, loop_scope
@@ -299,8 +317,8 @@ class SymbolicExecutionEngine:
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        loop_scope: list,
-        path_constraints: list,
+        loop_scope: LinkedStack,
+        path_constraints: LinkedStack,
     ):
         if not (parts := self.split_assignment(instruction.expression)):
             # TODO these might be func calls
@@ -348,7 +366,7 @@ class SymbolicExecutionEngine:
         symbolic_table.update_symbol(variable, new_sym_value, loop_scope)
 
     def evaluate_variable_declaration(
-        self, instruction: Node, symbolic_table: SymbolicTable, loop_scope: list
+        self, instruction: Node, symbolic_table: SymbolicTable, loop_scope: LinkedStack
     ):
         # add the value to the symbolic table
         symbol_type = self.get_symbol_type(instruction.variable_declaration.type)
@@ -384,35 +402,35 @@ class SymbolicExecutionEngine:
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
-    ):
-        # psuh current scope
-        loop_scope.append(block.id)
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
+    ) -> LinkedStack:
+        # push current scope
+        return loop_scope.push(block.id)
 
     def evaluate_end_loop(
         self,
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
-    ):
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
+    ) -> LinkedStack:
         # prune false positives from candidates
         self.pattern_matcher.remove_changed_after_detected_false_positives(
             symbolic_table
         )
 
         # pop the current scope
-        loop_scope.pop()
+        return loop_scope.pop()
 
     def evaluate_if_loop(
         self,
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        path_contraints: list,
-        loop_scope: list,
+        path_contraints: LinkedStack,
+        loop_scope: LinkedStack,
     ):
         if_operation = self.build_if_operation(
             block, instruction, symbolic_table, loop_scope
@@ -434,30 +452,25 @@ class SymbolicExecutionEngine:
         }
 
     def evaluate_default(
-        self, instruction: Node, symbolic_table: SymbolicTable, path_contraints: list
+        self, instruction: Node, symbolic_table: SymbolicTable, path_contraints: LinkedStack
     ):
         pass
 
     def check_path_constraints(
         self,
         branch_condition,
-        path_contraints: list,
+        path_contraints: LinkedStack,
     ):
-        # Get the current path constraints
-        # TODO maybe store it directly like this
-        path_constraints = And(path_contraints)
-
         # Check if the branch is reachable
-        check_constraint = And(path_constraints, branch_condition)
-
-        return self.solver.check(check_constraint) == sat
+        # the path constraints are already asserted in the solver
+        return self.pattern_matcher.check(branch_condition, path_contraints) == sat
 
     def build_if_operation(
         self,
         block: Block,
         instruction: Node,
         symbolic_table: SymbolicTable,
-        loop_scope: list,
+        loop_scope: LinkedStack,
     ):
         # store all operations being made
         operations = {}
@@ -591,7 +604,7 @@ class SymbolicExecutionEngine:
         symbolic_table: SymbolicTable,
         block: Block,
         instruction: Node,
-        loop_scope: list,
+        loop_scope: LinkedStack,
     ):  # sourcery skip: extract-duplicate-method
         # Split the expression based on the operator
         parts = operation.split(operator)
@@ -640,7 +653,7 @@ class SymbolicExecutionEngine:
         symbolic_table: SymbolicTable,
         block: Block,
         instruction: Node,
-        loop_scope: list,
+        loop_scope: LinkedStack,
     ):
         arithmetic_operators = ["+", "-", "*", "/", "%"]
         boolean_operators = ["<", "<=", ">", ">=", "==", "!=", "&&", "||", "!"]
@@ -722,7 +735,7 @@ class SymbolicExecutionEngine:
         symbolic_table: SymbolicTable,
         block: Block,
         instruction: Node,
-        loop_scope: list,
+        loop_scope: LinkedStack,
     ):
         assign_symb_value = self.build_symbolic_value(
             assignment, symbolic_table, block, instruction, loop_scope
@@ -747,10 +760,10 @@ class SymbolicExecutionEngine:
         symbolic_table: SymbolicTable,
         block: Block = None,
         instruction: Node = None,
-        loop_scope: list = None,
+        loop_scope: LinkedStack = None,
     ):
         if loop_scope is None:
-            loop_scope = []
+            loop_scope = LinkedStack()
 
         result_list = []
 
@@ -810,7 +823,7 @@ class SymbolicExecutionEngine:
                             instruction,
                             token,
                             symbolic_table,
-                            self.cfg.contract.functions,
+                            self.cfg.function_summaries,
                             loop_scope,
                         )
 
@@ -896,3 +909,27 @@ class SymbolicExecutionEngine:
     def is_function_call(self, token):
         pattern = r"^\w+\(.*\)$"
         return bool(re.match(pattern, token))
+
+
+def export_patterns(filename: str, cfg: CFG, pattern_matcher: PatternMatcher):
+    """
+    Writes the patterns.txt report of a function, also for functions skipped by the prefilter
+    """
+    dir_path = os.path.join(
+        "output",
+        filename.replace(".sol", ""),
+        cfg.contract.name,
+        cfg.function.name,
+    )
+
+    if not os.path.exists(dir_path):
+        os.makedirs(dir_path)
+
+    # Create the file path
+    file_path = os.path.join(dir_path, "patterns")
+
+    with open(f"{file_path}.txt", "w", encoding="utf8") as f:
+        if not pattern_matcher._patterns:
+            f.write("** No Patterns found **")
+        else:
+            f.write(str(pattern_matcher))
@@ -1,5 +1,6 @@
 from typing import Dict, List
 from enum import Enum
+from copy import deepcopy
 
 from z3 import *
 
@@ -11,9 +12,36 @@ class SymbolType(Enum):
 
 
 class SymbolicTable:
+    """
+    SymbolicTable class
+
+    Symbols are indexed by name, by loop scope and by taint scope.
+    Copy-on-write, forked tables share the indexes and symbols
+    until one of them modifies them
+
+    """
+
+    __slots__ = (
+        "_symbols",
+        "_scopes",
+        "_taint_scopes",
+        "_owned_indexes",
+        "_owned_symbols",
+    )
+
     def __init__(self):
-        # maps each symbol to its scope
-        self._table: dict[int, list[Symbol]] = {}
+        # names are unique, an existing symbol is moved instead of shadowed
+        self._symbols: dict[str, Symbol] = {}
+
+        # maps each scope to its symbols, by name
+        self._scopes: dict[int, dict[str, Symbol]] = {}
+
+        # maps each taint scope to the symbols last tainted in it, by name
+        self._taint_scopes: dict[int, dict[str, Symbol]] = {}
+
+        # indexes and symbols that are not shared with another table
+        self._owned_indexes: set = set()
+        self._owned_symbols: set[Symbol] = set()
 
     def __str__(self):
         """
@@ -23,16 +51,96 @@ class SymbolicTable:
             String representation of the Symbolic Table.
         """
         symbols = []
-        sorted_scopes = sorted(self._table.keys())  # Sort scopes in ascending order
+        sorted_scopes = sorted(self._scopes.keys())  # Sort scopes in ascending order
 
         for scope in sorted_scopes:
-            symbol_list = self._table[scope]
+            symbol_list = self._scopes[scope].values()
             symbols.extend(
                 f"Scope: {scope}, Symbol: {symbol.name}, Value: {symbol.value}, Type: {symbol.type} SCOPE: {symbol.loop_scope}"
                 for symbol in symbol_list
             )
         return "\n".join(symbols)
 
+    def fork(self) -> "SymbolicTable":
+        """
+        Copy of the table for a new path, O(1)
+
+        Returns:
+            SymbolicTable: table sharing the indexes and symbols of this one
+        """
+        table = SymbolicTable.__new__(SymbolicTable)
+        table._symbols = self._symbols
+        table._scopes = self._scopes
+        table._taint_scopes = self._taint_scopes
+        table._owned_indexes = set()
+        table._owned_symbols = set()
+
+        # shared from now on, both tables copy them before writing
+        self._owned_indexes = set()
+        self._owned_symbols = set()
+
+        return table
+
+    def get_writable_symbols(self) -> Dict[str, "Symbol"]:
+        if "symbols" not in self._owned_indexes:
+            self._symbols = dict(self._symbols)
+            self._owned_indexes.add("symbols")
+        return self._symbols
+
+    def get_writable_scope(self, loop_scope: int) -> Dict[str, "Symbol"]:
+        if ("scope", loop_scope) not in self._owned_indexes:
+            if "scopes" not in self._owned_indexes:
+                self._scopes = dict(self._scopes)
+                self._owned_indexes.add("scopes")
+
+            self._scopes[loop_scope] = dict(self._scopes.get(loop_scope, {}))
+            self._owned_indexes.add(("scope", loop_scope))
+        return self._scopes[loop_scope]
+
+    def get_writable_taint_scope(self, taint_scope: int) -> Dict[str, "Symbol"]:
+        if ("taint_scope", taint_scope) not in self._owned_indexes:
+            if "taint_scopes" not in self._owned_indexes:
+                self._taint_scopes = dict(self._taint_scopes)
+                self._owned_indexes.add("taint_scopes")
+
+            self._taint_scopes[taint_scope] = dict(
+                self._taint_scopes.get(taint_scope, {})
+            )
+            self._owned_indexes.add(("taint_scope", taint_scope))
+        return self._taint_scopes[taint_scope]
+
+    def get_writable_symbol(self, symbol: "Symbol") -> "Symbol":
+        """
+        Returns the symbol if this table owns it, otherwise replaces it with a private copy
+        """
+        if symbol in self._owned_symbols:
+            return symbol
+
+        symbol_copy = symbol.copy()
+
+        self.get_writable_symbols()[symbol.name] = symbol_copy
+        self.get_writable_scope(symbol.loop_scope)[symbol.name] = symbol_copy
+        self.get_writable_taint_scope(symbol.taint_scope)[symbol.name] = symbol_copy
+        self._owned_symbols.add(symbol_copy)
+
+        return symbol_copy
+
+    def move_symbol(self, symbol: "Symbol", loop_scope: int):
+        """
+        Moves a writable symbol to another scope
+        """
+        del self.get_writable_scope(symbol.loop_scope)[symbol.name]
+        self.get_writable_scope(loop_scope)[symbol.name] = symbol
+        symbol.loop_scope = loop_scope
+
+    def taint_symbol(self, symbol: "Symbol", taint_scope: int):
+        """
+        Moves a writable symbol to another taint scope
+        """
+        del self.get_writable_taint_scope(symbol.taint_scope)[symbol.name]
+        self.get_writable_taint_scope(taint_scope)[symbol.name] = symbol
+        symbol.taint_scope = taint_scope
+
     def push_symbol(self, symbol_name: str, type: SymbolType, loop_scope: int = 0):
         """
         Initialize a symbol in the dictionary with the given symbol name, type, and scope.
@@ -45,15 +153,16 @@ class SymbolicTable:
         """
         if existing_symbol := self.get_symbol(symbol_name):
             # Symbol already exists, move it to the correct key in the table
-            old_scope = existing_symbol.loop_scope
-            if old_scope != loop_scope:
-                self._table[old_scope].remove(existing_symbol)
-                self._table.setdefault(loop_scope, []).append(existing_symbol)
-                existing_symbol.loop_scope = loop_scope
+            if existing_symbol.loop_scope != loop_scope:
+                existing_symbol = self.get_writable_symbol(existing_symbol)
+                self.move_symbol(existing_symbol, loop_scope)
                 existing_symbol.is_loop_bounded = bool(loop_scope)
         else:
             symbol = Symbol(symbol_name, type, loop_scope)
-            self._table.setdefault(loop_scope, []).append(symbol)
+            self.get_writable_symbols()[symbol_name] = symbol
+            self.get_writable_scope(loop_scope)[symbol_name] = symbol
+            self.get_writable_taint_scope(symbol.taint_scope)[symbol_name] = symbol
+            self._owned_symbols.add(symbol)
 
     def update_symbol(self, symbol_name: str, value, loop_scope: list = None):
         """
@@ -67,14 +176,13 @@ class SymbolicTable:
         """
 
         if symbol := self.get_symbol(symbol_name):
+            symbol = self.get_writable_symbol(symbol)
             symbol.value = value if value is not None else Int(symbol_name)
 
             if loop_scope:
                 latest_scope = loop_scope[-1]
                 if symbol.loop_scope != latest_scope:
-                    self._table[symbol.loop_scope].remove(symbol)
-                    self._table.setdefault(latest_scope, []).append(symbol)
-                    symbol.loop_scope = latest_scope
+                    self.move_symbol(symbol, latest_scope)
 
                 # assignment inside loop, update taint list
                 loop_bounded_symbols = self.get_symbols_by_scope(latest_scope)
@@ -82,10 +190,9 @@ class SymbolicTable:
                 for loop_bounded_symbol in loop_bounded_symbols:
                     if self.is_symbol_in_condition(value, loop_bounded_symbol):
                         symbol._tainted_by.append(symbol)
-                        symbol.taint_scope = latest_scope
+                        self.taint_symbol(symbol, latest_scope)
 
     def get_symbol(self, symbol_name: str) -> Symbol:
-        # sourcery skip: remove-unnecessary-cast
         """
         Retrieve the symbol from the dictionary based on the given symbol name.
 
@@ -95,17 +202,7 @@ class SymbolicTable:
         Returns:
             The Symbol object corresponding to the given symbol name, or None if not found.
         """
-
-        # Iterate from highest to lowest scope, since it's more likely that the symbol is in an higher scope
-        scopes = range(max(self._table.keys(), default=0), -1, -1)
-
-        for scope in scopes:
-            symbol_list = self._table.get(scope, [])
-            for symbol in symbol_list:
-                if symbol.name == str(symbol_name):
-                    return symbol
-
-        return None
+        return self._symbols.get(str(symbol_name))
 
     def get_symbol_value(self, symbol_name: str):
         """
@@ -134,7 +231,7 @@ class SymbolicTable:
         Returns:
             List of symbols with the specified scope.
         """
-        return self._table.get(loop_scope, [])
+        return list(self._scopes.get(loop_scope, {}).values())
 
     def get_tainted_symbols_in_scope(self, taint_scope: int) -> List[Symbol]:
         """
@@ -146,13 +243,7 @@ class SymbolicTable:
         Returns:
             List of tainted symbols.
         """
-
-        tainted_symbols = []
-        for symbol_list in self._table.values():
-            tainted_symbols.extend(
-                symbol for symbol in symbol_list if symbol.taint_scope == taint_scope
-            )
-        return tainted_symbols
+        return list(self._taint_scopes.get(taint_scope, {}).values())
 
     def is_symbol_in_condition(self, expr, symbol):
         if isinstance(expr, (ArithRef, BoolRef)):
@@ -166,12 +257,23 @@ class SymbolicTable:
         """Returns the Symbolic Table
 
         Returns:
-            Dict(vars): Dict of variables
+            Dict(scope, Dict(name, Symbol)): variables of each scope, read-only
         """
-        return self._table
+        return self._scopes
 
 
 class Symbol:
+    # symbolic execution copies every Symbol on each branch
+    __slots__ = (
+        "_name",
+        "_value",
+        "_type",
+        "_is_loop_bounded",
+        "_loop_scope",
+        "_tainted_by",
+        "_taint_scope",
+    )
+
     def __init__(
         self, name: str, type: SymbolType, loop_scope: int = 0, taint_list: list = None
     ):
@@ -196,6 +298,39 @@ class Symbol:
         # Scope where symbol was last tainted
         self._taint_scope: int = loop_scope
 
+    def copy(self) -> "Symbol":
+        """
+        Shallow copy, Z3 values are immutable and can be shared
+        """
+        symbol = Symbol.__new__(Symbol)
+
+        symbol._name = self._name
+        symbol._value = self._value
+        symbol._type = self._type
+        symbol._is_loop_bounded = self._is_loop_bounded
+        symbol._loop_scope = self._loop_scope
+        symbol._tainted_by = [
+            symbol if tainted is self else tainted for tainted in self._tainted_by
+        ]
+        symbol._taint_scope = self._taint_scope
+
+        return symbol
+
+    def __deepcopy__(self, memo):
+        # field by field, avoids the generic __reduce_ex__ path of slotted objects
+        symbol = Symbol.__new__(Symbol)
+        memo[id(self)] = symbol
+
+        symbol._name = self._name
+        symbol._value = deepcopy(self._value, memo)
+        symbol._type = self._type
+        symbol._is_loop_bounded = self._is_loop_bounded
+        symbol._loop_scope = self._loop_scope
+        symbol._tainted_by = deepcopy(self._tainted_by, memo)
+        symbol._taint_scope = self._taint_scope
+
+        return symbol
+
     @property
     def name(self):
         """
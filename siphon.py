@@ -1,53 +1,412 @@
+from __future__ import annotations
+
 import argparse
 import os
+import sys
+import glob
+from typing import TYPE_CHECKING
 
-from slither.core.declarations import Function, Contract
+# the pipeline modules pull in slither and z3, which dominate startup time
+# they are imported where they are used, so --help and argument errors stay fast
+if TYPE_CHECKING:
+    from slither.core.declarations import Function, Contract
 
-from modules.slither.slitherSingleton import slitherSingleton
-from modules.cfg_builder.cfg import CFG
-from modules.symbolic_execution_engine.seEngine import SymbolicExecutionEngine
-from modules.code_optimizer.optimizer import optimizerSingleton
-from modules.code_optimizer.codeGenerator import codeGeneratorSingleton
-from modules.pattern_matcher.patterns import Pattern
+    from modules.cfg_builder.cfg import CFG
+    from modules.pattern_matcher.patterns import Pattern
 
 
 def main() -> None:
+    # `siphon.py serve ...` keeps a warm analysis daemon running
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Function Analyzer")
 
     # Add command line arguments
-    parser.add_argument("-f", "--filename", type=str, help="File name", required=True)
+    parser.add_argument(
+        "-f",
+        "--filename",
+        type=str,
+        nargs="+",
+        help="File name(s), directories or glob patterns",
+        required=True,
+    )
     parser.add_argument("-c", "--contract_name", type=str, help="Contract name")
     parser.add_argument("-fn", "--function_name", type=str, help="Function name")
     parser.add_argument("-e", "--export_cfgs", action="store_true", help="Export CFGs")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose Mode")
+    add_pipeline_arguments(parser)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Worker processes in batch mode"
+    )
+    parser.add_argument(
+        "-fj",
+        "--function_jobs",
+        type=int,
+        default=1,
+        help="Worker processes analysing the functions of a file",
+    )
+    parser.add_argument(
+        "-a",
+        "--artifacts",
+        action="store_true",
+        help="Resume from the CFG and pattern artifacts of previous runs, saving new ones",
+    )
 
     # Parse the command line arguments
     args = parser.parse_args()
-    filename, contract_name, function_name, export_cfgs, verbose = (
+    targets, contract_name, function_name, export_cfgs, verbose, function_jobs = (
         args.filename,
         args.contract_name,
         args.function_name,
         args.export_cfgs,
         args.verbose,
+        args.function_jobs,
     )
 
+    from modules.slither.compilationCache import compilationCache
+    from modules.incremental.analysisCache import analysisCache
+    from modules.pattern_matcher.patternPrefilter import patternPrefilter
+    from modules.pattern_matcher.queryCache import queryCache
+    from modules.pattern_matcher.solverBudget import solverBudget
+
+    init_pipeline(args)
+
     # output dir
     if not os.path.exists("output"):
         os.makedirs("output")
 
+    filenames = expand_targets(targets)
+
+    if not filenames:
+        print("[*] - No Solidity files found...\n")
+        return
+
+    if args.jobs > 1 and len(filenames) > 1:
+        from functools import partial
+
+        from modules.runner.parallelRunner import ParallelRunner
+
+        # each worker process analyses whole files, configured like this process
+        results = ParallelRunner(
+            args.jobs, initializer=partial(init_pipeline, args)
+        ).run(
+            run_file,
+            [
+                (
+                    filename,
+                    contract_name,
+                    function_name,
+                    export_cfgs,
+                    verbose,
+                    function_jobs,
+                    args.artifacts,
+                )
+                for filename in filenames
+            ],
+        )
+
+        for result in results:
+            if result["error"]:
+                print(f"[*] - Failed: {result['args'][0]} ({result['error']})\n")
+
+        if verbose:
+            print("[*] - Cache and solver counters are kept by each -j worker, not reported\n")
+
+        return
+
+    # a single long-lived process handles every file
+    for index, filename in enumerate(filenames):
+        if len(filenames) > 1:
+            print(f"[*] - File: {filename} ({index + 1}/{len(filenames)})\n")
+
+        try:
+            run_file(
+                filename,
+                contract_name,
+                function_name,
+                export_cfgs,
+                verbose,
+                function_jobs,
+                args.artifacts,
+            )
+        except Exception as e:
+            # one broken file should not abort the whole batch
+            if len(filenames) == 1:
+                raise
+            print(f"[*] - Failed: {filename} ({type(e).__name__}: {e})\n")
+
+    if verbose and compilationCache.enabled:
+        print(
+            f"[*] - Compilation cache: <{compilationCache.hits}> hits, <{compilationCache.misses}> misses\n"
+        )
+
+    if verbose and analysisCache.enabled:
+        print(
+            f"[*] - Analysis cache: <{analysisCache.hits}> reused, <{analysisCache.misses}> analysed functions\n"
+        )
+
+    if verbose:
+        print(
+            f"[*] - Prefilter: <{patternPrefilter.skipped}> skipped, <{patternPrefilter.analysed}> symbolically executed functions\n"
+        )
+
+    # symbolic execution runs in the -fj workers, their solver counters stay there
+    solver_scope = " (main process, -fj workers not counted)" if function_jobs > 1 else ""
+
+    if verbose and queryCache.enabled:
+        print(
+            f"[*] - Query cache{solver_scope}: <{queryCache.hits}> hits, <{queryCache.misses}> misses, <{queryCache.saved_time:.2f}s> of solving saved\n"
+        )
+
+    if verbose:
+        print(
+            f"[*] - Solver budget{solver_scope}: <{solverBudget.unknown_queries}> unknown queries, <{solverBudget.exhausted_functions}> functions over budget\n"
+        )
+
+
+def add_pipeline_arguments(parser: argparse.ArgumentParser):
+    """
+    Options of the analysis pipeline, shared by the command line and the daemon
+    """
+    parser.add_argument(
+        "-ef",
+        "--export_format",
+        choices=["dot", "jsonl", "graphml"],
+        default="dot",
+        help="CFG export format, jsonl and graphml write one file per contract",
+    )
+    parser.add_argument(
+        "-nc",
+        "--no_cache",
+        action="store_true",
+        help="Disable the compilation and analysis caches",
+    )
+    parser.add_argument(
+        "--cache_dir", type=str, default=".siphon_cache", help="Compilation and analysis cache dir"
+    )
+    parser.add_argument(
+        "--cache_size", type=int, default=512, help="Compilation cache size cap (MB)"
+    )
+    parser.add_argument(
+        "--solver_cache_size",
+        type=int,
+        default=100000,
+        help="Satisfiability queries kept in memory, 0 disables the query cache",
+    )
+    parser.add_argument(
+        "--query_timeout",
+        type=int,
+        default=2000,
+        help="Solver timeout per query (ms), 0 for none",
+    )
+    parser.add_argument(
+        "--function_timeout",
+        type=float,
+        default=10.0,
+        help="Solver time budget per function (s), 0 for none",
+    )
+    parser.add_argument(
+        "--function_queries",
+        type=int,
+        default=5000,
+        help="Solver queries budget per function, 0 for none",
+    )
+
+
+def init_pipeline(args: argparse.Namespace):
+    """
+    Configures the caches, CFG export and solver budget from the parsed pipeline options
+    """
+    from modules.slither.compilationCache import compilationCache
+    from modules.incremental.analysisCache import analysisCache
+    from modules.cfg_builder.cfgExport import cfgExporter
+    from modules.pattern_matcher.queryCache import queryCache
+    from modules.pattern_matcher.solverBudget import solverBudget
+
+    # solc artifacts are reused across runs on unchanged files
+    compilationCache.init_instance(
+        args.cache_dir, args.cache_size * 1024 * 1024, not args.no_cache
+    )
+
+    # so are the outputs of unchanged functions. CFG exports need a real analysis
+    analysisCache.init_instance(
+        args.cache_dir,
+        not args.no_cache and not getattr(args, "export_cfgs", False),
+    )
+
+    cfgExporter.init_instance(args.export_format)
+
+    # repeated branch conditions are only solved once per process
+    queryCache.init_instance(args.solver_cache_size, args.solver_cache_size > 0)
+
+    # branches over budget are explored as unknown, without P1/P2
+    solverBudget.init_instance(
+        args.query_timeout, args.function_timeout, args.function_queries
+    )
+
+
+def serve(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="siphon.py serve", description="Siphon analysis daemon"
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=str,
+        help="Unix domain socket to listen on, defaults to stdin/stdout",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "-t", "--timeout", type=int, default=None, help="Time limit per request (s)"
+    )
+    add_pipeline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from functools import partial
+
+    from modules.server.siphonServer import SiphonServer
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    # the workers run the pipeline, each of them is configured like a command line run
+    server = SiphonServer(
+        run_file, args.jobs, args.timeout, setup=partial(init_pipeline, args)
+    )
+
+    if args.socket:
+        server.serve_socket(args.socket)
+    else:
+        server.serve_stdio()
+
+
+def expand_targets(targets: list[str]) -> list[str]:
+    """
+    Returns the Solidity files referenced by a list of files, directories or glob patterns
+    """
+    filenames = []
+    seen = set()
+    for target in targets:
+        if os.path.isdir(target):
+            matches = sorted(
+                glob.glob(os.path.join(target, "**", "*.sol"), recursive=True)
+            )
+        elif glob.has_magic(target):
+            matches = sorted(glob.glob(target, recursive=True))
+        else:
+            matches = [target]
+
+        # keep the order and ignore duplicates
+        for match in matches:
+            if match not in seen:
+                seen.add(match)
+                filenames.append(match)
+
+    return filenames
+
+
+def run_file(
+    filename: str,
+    contract_name=None,
+    function_name=None,
+    export_cfgs=False,
+    verbose=False,
+    function_jobs=1,
+    artifacts=False,
+) -> list[dict]:
+    """
+    Runs the whole pipeline over a single file, compiling it only once
+
+    Returns the found patterns per function, and whether it was optimized
+    """
+    from modules.slither.slitherSingleton import slitherSingleton
+    from modules.incremental.analysisCache import analysisCache
+    from modules.code_optimizer.sourceIndex import sourceIndexCache
+    from modules.cfg_builder.cfgExport import cfgExporter
+    from modules.slither.functionSummaries import functionSummaryCache
+
     # Wrapper around Slither
-    slitherSingleton.init_slither_instance(filename)
+    slitherSingleton.init_slither_instance(filename, override=True)
+
+    # in batch mode, only some of the files contain the requested contract
+    if contract_name and not slitherSingleton.get_functions_by_contract().get(
+        contract_name
+    ):
+        print("[*] - Contract not found...\n")
+        return []
+
+    if (
+        contract_name
+        and function_name
+        and not any(
+            function.name == function_name
+            for function in slitherSingleton.get_all_functions_in_contract(
+                contract_name
+            )
+        )
+    ):
+        print("[*] - Function not found...\n")
+        return []
 
-    # Build CFG and find patterns
-    patterns = siphon_patterns(
-        filename, contract_name, function_name, export_cfgs, verbose
+    # only functions that changed since the previous run are analysed again
+    reused_summaries, targets = analysisCache.partition(
+        filename, collect_targets(contract_name, function_name)
     )
 
-    # Optimize the resulting CFGs given the found patterns
-    optimized_cfgs = optimize_patterns(filename, patterns, export_cfgs, verbose)
+    try:
+        # Build CFG and find patterns
+        patterns = siphon_patterns(
+            filename,
+            contract_name,
+            function_name,
+            export_cfgs,
+            verbose,
+            function_jobs,
+            targets,
+            artifacts,
+        )
 
-    # Generate the optimized function code
-    generate_source_code(optimized_cfgs, filename, verbose)
+        # Optimize the resulting CFGs given the found patterns
+        optimized_cfgs = optimize_patterns(filename, patterns, export_cfgs, verbose)
+
+        # Generate the optimized function code
+        generate_source_code(optimized_cfgs, filename, verbose)
+    finally:
+        # the source index is only needed while generating code for this file
+        sourceIndexCache.release(filename)
+
+        # flush the per-contract CFG exports
+        cfgExporter.close()
+
+        # contract ids are only unique within a compilation
+        functionSummaryCache.release()
+
+    # plain data, so it can be sent back from a worker process
+    summaries = [
+        {
+            "filename": filename,
+            "contract": cfg.contract.name,
+            "function": cfg.function.name,
+            "patterns": [pattern.pattern_type.name for pattern in function_patterns],
+            "optimized": cfg in optimized_cfgs,
+            "output_dir": os.path.join(
+                "output",
+                filename.replace(".sol", ""),
+                cfg.contract.name,
+                cfg.function.name,
+            ),
+        }
+        for cfg, function_patterns in patterns.items()
+    ]
+
+    for cfg, summary in zip(patterns, summaries):
+        analysisCache.store(filename, cfg.contract, cfg.function, summary)
+
+    return reused_summaries + summaries
 
 
 def siphon_patterns(
@@ -56,16 +415,137 @@ def siphon_patterns(
     function_name=None,
     export_cfgs=False,
     verbose=False,
+    function_jobs=1,
+    targets: list[tuple[Contract, Function]] = None,
+    artifacts=False,
 ) -> dict[CFG, list[Pattern]]:
     """
     Returns the mapped patterns per function in each contract
+
+    If targets is provided, only those (contract, function) pairs are analysed.
+    With artifacts, functions with a valid artifact skip CFG construction and SE,
+    and the artifacts of the analysed ones are saved
     """
+    from modules.pattern_matcher.patternPrefilter import patternPrefilter
+    from modules.pattern_matcher.patternMatcher import PatternMatcher
+    from modules.symbolic_execution_engine.seEngine import export_patterns
+
     if verbose:
         print("[*] - Starting Pattern Matcher...\n")
 
-    # maps the patterns per function per contract
-    # the CFG provides an hash function that maps to the Contract and Function
-    patterns_per_function = {}
+    if targets is None:
+        targets = collect_targets(contract_name, function_name)
+
+    # functions without IFs or loops can't match any pattern, only their CFG is built
+    skipped_patterns = {}
+    remaining_targets = []
+    for contract, function in targets:
+        if patternPrefilter.should_analyse(function):
+            remaining_targets.append((contract, function))
+        else:
+            cfg = build_function_cfg(filename, contract, function, export_cfgs)
+            skipped_patterns[cfg] = []
+
+            # same empty report as a symbolic execution without findings
+            export_patterns(filename, cfg, PatternMatcher())
+
+    if verbose and skipped_patterns:
+        print(f" - Skipped <{len(skipped_patterns)}> functions without patterns\n")
+
+    targets = remaining_targets
+
+    loaded_patterns = {}
+    if artifacts:
+        remaining_targets = []
+        for contract, function in targets:
+            if loaded := load_function_artifact(filename, contract, function):
+                cfg, patterns = loaded
+                loaded_patterns[cfg] = patterns
+            else:
+                remaining_targets.append((contract, function))
+
+        if verbose:
+            print(f" - Loaded <{len(loaded_patterns)}> artifacts\n")
+
+        targets = remaining_targets
+
+    if function_jobs > 1 and len(targets) > 1:
+        patterns_per_function = analyse_functions_in_parallel(
+            filename, targets, export_cfgs, verbose, function_jobs
+        )
+    else:
+        # maps the patterns per function per contract
+        # the CFG provides an hash function that maps to the Contract and Function
+        patterns_per_function = {}
+        for contract, function in targets:
+            cfg, patterns = analyse_function(
+                filename, contract, function, export_cfgs, verbose
+            )
+            patterns_per_function[cfg] = patterns
+
+            if verbose:
+                print(f" - Found <{len(patterns)}> patterns\n")
+
+    # saved before the optimizer modifies the CFGs
+    if artifacts:
+        for cfg, patterns in patterns_per_function.items():
+            save_function_artifact(filename, cfg, patterns)
+
+    patterns_per_function.update(loaded_patterns)
+    patterns_per_function.update(skipped_patterns)
+
+    if verbose:
+        print("[*] - Finished matching patterns...\n")
+
+    return patterns_per_function
+
+
+def get_artifact_path(filename: str, contract: Contract, function: Function) -> str:
+    return os.path.join(
+        "output",
+        filename.replace(".sol", ""),
+        contract.name,
+        function.name,
+        "artifact.json",
+    )
+
+
+def load_function_artifact(
+    filename: str, contract: Contract, function: Function
+) -> tuple[CFG, list[Pattern]]:
+    """
+    Returns the CFG and patterns of a previous run, None if missing or stale
+    """
+    from modules.pattern_matcher.patternPayload import read_artifact, load_artifact
+
+    artifact_path = get_artifact_path(filename, contract, function)
+    if not os.path.exists(artifact_path):
+        return None
+
+    try:
+        return load_artifact(read_artifact(artifact_path), filename, contract, function)
+    except (OSError, ValueError, KeyError, IndexError, TypeError, StopIteration):
+        return None
+
+
+def save_function_artifact(filename: str, cfg: CFG, patterns: list[Pattern]):
+    from modules.pattern_matcher.patternPayload import build_artifact, write_artifact
+
+    write_artifact(
+        get_artifact_path(filename, cfg.contract, cfg.function),
+        build_artifact(cfg, patterns),
+    )
+
+
+def collect_targets(
+    contract_name=None, function_name=None
+) -> list[tuple[Contract, Function]]:
+    """
+    Returns the functions to analyse, as (contract, function) pairs
+    """
+    from modules.slither.slitherSingleton import slitherSingleton
+
+    targets = []
     # If contract_name is not provided, execute for all functions inside all contracts
     if not contract_name:
         for (
@@ -73,40 +553,88 @@ def siphon_patterns(
             functions,
         ) in slitherSingleton.get_functions_by_contract().items():
             contract = slitherSingleton.get_contract_by_name(contract_name)
-            for function in functions:
-                cfg, patterns = analyse_function(
-                    filename, contract, function, export_cfgs, verbose
-                )
-                patterns_per_function[cfg] = patterns
+            targets.extend((contract, function) for function in functions)
 
     # If contract_name is provided, but function_name is not, execute for all functions inside contract
     elif not function_name:
         contract = slitherSingleton.get_contract_by_name(contract_name)
-        for function in slitherSingleton.get_all_functions_in_contract(contract_name):
-            cfg, patterns = analyse_function(
-                filename, contract, function, export_cfgs, verbose
+        targets.extend(
+            (contract, function)
+            for function in slitherSingleton.get_all_functions_in_contract(
+                contract_name
             )
-            patterns_per_function[cfg] = patterns
-
-            if verbose:
-                print(f" - Found <{len(patterns)}> patterns\n")
+        )
 
     else:
         # If both contract_name and function_name are provided, execute for the specific function in the contract
         contract = slitherSingleton.get_contract_by_name(contract_name)
         function = slitherSingleton.get_function_by_name(contract_name, function_name)
+        targets.append((contract, function))
 
-        cfg, patterns = analyse_function(
-            filename, contract, function, export_cfgs, verbose
-        )
+    return targets
+
+
+def analyse_functions_in_parallel(
+    filename: str,
+    targets: list[tuple[Contract, Function]],
+    export_cfgs=False,
+    verbose=False,
+    function_jobs=1,
+) -> dict[CFG, list[Pattern]]:
+    """
+    Fans out the analysis of each function to forked worker processes
+
+    Workers inherit the compiled unit, so only the CFG and pattern artifacts travel back
+    and are rehydrated in the parent, without building the CFGs again.
+    CFGs are exported by the parent, per-contract export files have a single writer
+    """
+    from modules.pattern_matcher.patternPayload import load_artifact
+    from modules.runner.parallelRunner import ParallelRunner
+
+    results = ParallelRunner(function_jobs, fork=True).run(
+        analyse_function_task,
+        [
+            (filename, contract.name, function.full_name, False, verbose)
+            for contract, function in targets
+        ],
+    )
+
+    patterns_per_function = {}
+    for (contract, function), result in zip(targets, results):
+        if result["error"]:
+            print(f"[*] - Failed: {contract.name}.{function.name} ({result['error']})\n")
+            continue
+
+        cfg, patterns = load_artifact(result["result"], filename, contract, function)
         patterns_per_function[cfg] = patterns
 
-    if verbose:
-        print("[*] - Finished matching patterns...\n")
+        if export_cfgs:
+            cfg.export()
 
     return patterns_per_function
 
 
+def analyse_function_task(
+    filename: str,
+    contract_name: str,
+    function_full_name: str,
+    export_cfgs=False,
+    verbose=False,
+) -> dict:
+    """
+    Worker side of analyse_functions_in_parallel
+    """
+    from modules.slither.slitherSingleton import slitherSingleton
+    from modules.pattern_matcher.patternPayload import build_artifact
+
+    contract = slitherSingleton.get_contract_by_name(contract_name)
+    function = contract.get_function_from_full_name(function_full_name)
+
+    cfg, patterns = analyse_function(filename, contract, function, export_cfgs, verbose)
+
+    return build_artifact(cfg, patterns)
+
+
 def analyse_function(
     filename: str,
     contract: Contract,
@@ -117,6 +645,7 @@ def analyse_function(
     """
     Finds patterns in a function by constructing a CFG and executing SE on it
     """
+    from modules.symbolic_execution_engine.seEngine import SymbolicExecutionEngine
 
     if verbose:
         print("> Pattern finding...\n")
@@ -124,8 +653,7 @@ def analyse_function(
         print(f" - Function: {function.name}\n")
 
     # build the function's CFG
-    cfg = CFG(filename, contract, function, export_cfgs)
-    cfg.build_cfg()
+    cfg = build_function_cfg(filename, contract, function, export_cfgs)
 
     # perform SE on the CFG
     se_engine = SymbolicExecutionEngine(filename, cfg)
@@ -134,6 +662,17 @@ def analyse_function(
     return cfg, se_engine.find_patterns()
 
 
+def build_function_cfg(
+    filename: str, contract: Contract, function: Function, export_cfgs=False
+) -> CFG:
+    from modules.cfg_builder.cfg import CFG
+
+    cfg = CFG(filename, contract, function, export_cfgs)
+    cfg.build_cfg()
+
+    return cfg
+
+
 def optimize_patterns(
     filename: str,
     patterns: dict[CFG, list[Pattern]],
@@ -143,6 +682,7 @@ def optimize_patterns(
     """
     Returns the optimized list of CFGs
     """
+    from modules.code_optimizer.optimizer import optimizerSingleton
 
     if verbose:
         print("[*] - Starting Optimizer...\n")
@@ -178,6 +718,8 @@ def optimize_patterns(
 
 
 def generate_source_code(optimized_cfgs: list[CFG], filename: str, verbose=False):
+    from modules.code_optimizer.codeGenerator import codeGeneratorSingleton
+
     if verbose:
         print("[*] - Starting Code Generator...\n")
 
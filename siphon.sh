@@ -2,7 +2,7 @@
 
 # Function to show the usage of the script
 function usage() {
-    echo "Usage: $0 -f <filename> [-c <contract_name>] [-fn <function_name>] [-e] [-v] [-fm]"
+    echo "Usage: $0 -f <filename> [-c <contract_name>] [-fn <function_name>] [-e] [-v] [-fm] [-nc]"
     exit 1
 }
 
@@ -43,6 +43,7 @@ function_name=""
 export_cfgs=""
 verbose=""
 format=""
+no_cache=""
 
 # Parse command-line arguments
 while [[ "$#" -gt 0 ]]; do
@@ -68,6 +69,9 @@ while [[ "$#" -gt 0 ]]; do
         -fm|--format)
             format="true"
             ;;
+        -nc|--no_cache)
+            no_cache="true"
+            ;;
         -h|--help)
             usage
             exit 0
@@ -92,6 +96,7 @@ python_args=("-f" "$filename")
 [[ -n "$function_name" ]] && python_args+=("-fn" "$function_name")
 [[ -n "$export_cfgs" ]] && python_args+=("-e")
 [[ -n "$verbose" ]] && python_args+=("-v")
+[[ -n "$no_cache" ]] && python_args+=("-nc")
 
 # Execute the Python program with the provided arguments
 python3 siphon.py "${python_args[@]}"